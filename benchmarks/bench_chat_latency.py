@@ -0,0 +1,242 @@
+"""Measure end-to-end chat latency through the headless chat engine.
+
+Streams each prompt through start_chat() and ReplyPipeline exactly as the app
+does, without Streamlit, and reports time to first token, inter-token
+latency percentiles, delivered and generated tokens/sec, and the time spent
+parsing <think> blocks and flushing text to the (simulated) UI.
+
+Run from the repository root against a real Ollama server or a fake one:
+
+    python benchmarks/bench_chat_latency.py --model deepseek-r1:1.5b
+    python benchmarks/bench_chat_latency.py --concurrency 1 4 8 --requests 16 --json latency.json
+    python benchmarks/bench_chat_latency.py --prompts prompts.txt --csv latency.csv --host 127.0.0.1:11434
+
+Record real streams once with --record, then replay them with --replay to
+measure parsing and UI overhead without the model (--speed 0 replays as
+fast as possible, 10 ten times faster than recorded):
+
+    python benchmarks/bench_chat_latency.py --record r1.cassette --requests 8
+    python benchmarks/bench_chat_latency.py --replay r1.cassette --speed 0 --render-cost-ms 2
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat_engine.async_client import start_chat
+from chat_engine.cassette import Cassette
+from chat_engine.client import make_async_client
+from chat_engine.profiles import DEEPSEEK_R1
+from chat_engine.streaming import ReplyPipeline
+
+DEFAULT_PROMPTS = [
+    "Say hello in one short sentence.",
+    "What is the capital of France?",
+    "Explain what a hash map is in two sentences.",
+    "Write a haiku about local language models.",
+]
+
+
+def load_prompts(path):
+    """Prompts from a JSON list or a text file with one prompt per line."""
+    if not path:
+        return DEFAULT_PROMPTS
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".json"):
+            return json.load(f)
+        return [line.strip() for line in f if line.strip()]
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * q / 100), len(values) - 1)]
+
+
+def timed(func, totals, name):
+    """Wrap `func` so its run time accumulates in `totals[name]`."""
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            totals[name] += time.perf_counter() - start
+    return wrapper
+
+
+def stream_opener(client, cassette=None, mode=None, speed=1.0):
+    """An `open_stream(model, messages)` function for live, recorded or replayed streams."""
+    def open_stream(model, messages):
+        if mode == "replay":
+            return cassette.replay(model, messages, speed=speed)
+        stream = start_chat(model, messages, client=client)
+        return cassette.record(stream, model, messages) if mode == "record" else stream
+    return open_stream
+
+
+def run_request(open_stream, model, prompt, render_cost):
+    totals = {"parse": 0.0, "flush": 0.0}
+    arrivals = []
+
+    def render(text):
+        # Stand-in for st.markdown: materialize the text and optionally burn some time
+        if render_cost:
+            deadline = time.perf_counter() + render_cost
+            while time.perf_counter() < deadline:
+                pass
+        return len(text)
+
+    pipeline = ReplyPipeline(render=render, render_think=render)
+    pipeline.parser.feed = timed(pipeline.parser.feed, totals, "parse")
+    for scheduler in (pipeline.answer_scheduler, pipeline.think_scheduler):
+        scheduler.flush = timed(scheduler.flush, totals, "flush")
+
+    def arrivals_of(stream):
+        for chunk in stream:
+            if not chunk.get("done"):
+                arrivals.append(time.perf_counter())
+            yield chunk
+
+    started = time.perf_counter()
+    stream = open_stream(model, [{"role": "user", "content": prompt}])
+    try:
+        reply = pipeline.consume(arrivals_of(stream))
+    finally:
+        stream.cancel()
+    finished = time.perf_counter()
+
+    gaps = [b - a for a, b in zip(arrivals, arrivals[1:])]
+    stats = reply.stats
+    return {
+        "prompt": prompt,
+        "tokens": stats["tokens"],
+        "ttft_ms": stats["ttft"] * 1000 if stats["ttft"] is not None else None,
+        "itl_p50_ms": percentile(gaps, 50) * 1000 if gaps else None,
+        "itl_p90_ms": percentile(gaps, 90) * 1000 if gaps else None,
+        "itl_p99_ms": percentile(gaps, 99) * 1000 if gaps else None,
+        "delivered_tps": stats["delivered_tps"],
+        "generated_tps": stats["generated_tps"],
+        "parse_ms": totals["parse"] * 1000,
+        "flush_ms": totals["flush"] * 1000,
+        "flushes": stats["flushes"],
+        "total_ms": (finished - started) * 1000,
+        "think_chars": len(reply.think),
+        "answer_chars": len(reply.answer),
+    }
+
+
+def summarize(concurrency, results, wall):
+    def values(name):
+        return [r[name] for r in results if r.get(name) is not None]
+
+    def mean(name):
+        found = values(name)
+        return sum(found) / len(found) if found else None
+
+    tokens = sum(r["tokens"] for r in results)
+    return {
+        "concurrency": concurrency,
+        "requests": len(results),
+        "errors": sum(1 for r in results if "error" in r),
+        "ttft_p50_ms": percentile(values("ttft_ms"), 50),
+        "ttft_p90_ms": percentile(values("ttft_ms"), 90),
+        "itl_p50_ms": percentile(values("itl_p50_ms"), 50),
+        "itl_p99_ms": percentile(values("itl_p99_ms"), 99),
+        "delivered_tps": mean("delivered_tps"),
+        "generated_tps": mean("generated_tps"),
+        "aggregate_tps": tokens / wall if wall > 0 else None,
+        "parse_ms": mean("parse_ms"),
+        "flush_ms": mean("flush_ms"),
+        "wall_s": wall,
+    }
+
+
+def run_level(open_stream, model, prompts, concurrency, requests, render_cost):
+    jobs = [prompts[i % len(prompts)] for i in range(requests)]
+
+    def job(prompt):
+        try:
+            return run_request(open_stream, model, prompt, render_cost)
+        except Exception as e:
+            return {"prompt": prompt, "tokens": 0, "error": str(e)}
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        results = list(executor.map(job, jobs))
+    return results, time.perf_counter() - start
+
+
+def fmt(value, spec=".1f"):
+    return "N/A" if value is None else format(value, spec)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--model", default=DEEPSEEK_R1.default_model)
+    arg_parser.add_argument("--host", default=None, help="Ollama address (default: OLLAMA_HOST or localhost)")
+    arg_parser.add_argument("--prompts", default=None, help="Text file (one prompt per line) or JSON list")
+    arg_parser.add_argument("--concurrency", type=int, nargs="+", default=[1])
+    arg_parser.add_argument("--requests", type=int, default=None,
+                            help="Requests per concurrency level (default: one per prompt, at least the concurrency)")
+    arg_parser.add_argument("--render-cost-ms", type=float, default=0.0,
+                            help="Simulated cost of one UI render, to see how flush cadence affects throughput")
+    arg_parser.add_argument("--warmup", type=int, default=1, help="Untimed requests first, to load the model")
+    arg_parser.add_argument("--json", default=None, help="Write summaries and per-request results as JSON")
+    arg_parser.add_argument("--csv", default=None, help="Write per-request results as CSV")
+    arg_parser.add_argument("--record", default=None, help="Append the timed streams to this cassette file")
+    arg_parser.add_argument("--replay", default=None, help="Replay streams from this cassette instead of Ollama")
+    arg_parser.add_argument("--speed", type=float, default=1.0,
+                            help="Replay speed: 1 as recorded, 10 ten times faster, 0 as fast as possible")
+    args = arg_parser.parse_args()
+
+    prompts = load_prompts(args.prompts)
+    client = make_async_client(args.host)
+    if args.replay:
+        open_stream = stream_opener(client, Cassette(args.replay), "replay", args.speed)
+    else:
+        for _ in range(args.warmup):
+            run_request(stream_opener(client), args.model, prompts[0], 0)
+        open_stream = stream_opener(client, Cassette(args.record), "record") if args.record else stream_opener(client)
+
+    print(f"model {args.model}, {len(prompts)} prompts")
+    print(f"{'conc':>4}  {'reqs':>4}  {'err':>3}  {'TTFT p50':>8}  {'TTFT p90':>8}  {'ITL p50':>7}  {'ITL p99':>7}  "
+          f"{'tok/s':>7}  {'gen tok/s':>9}  {'agg tok/s':>9}  {'parse ms':>8}  {'flush ms':>8}")
+    summaries = []
+    rows = []
+    for concurrency in args.concurrency:
+        requests = args.requests or max(len(prompts), concurrency)
+        results, wall = run_level(open_stream, args.model, prompts, concurrency, requests, args.render_cost_ms / 1000)
+        summary = summarize(concurrency, results, wall)
+        summaries.append(summary)
+        rows.extend(dict(result, concurrency=concurrency) for result in results)
+        print(f"{concurrency:>4}  {summary['requests']:>4}  {summary['errors']:>3}  "
+              f"{fmt(summary['ttft_p50_ms']):>8}  {fmt(summary['ttft_p90_ms']):>8}  "
+              f"{fmt(summary['itl_p50_ms']):>7}  {fmt(summary['itl_p99_ms']):>7}  "
+              f"{fmt(summary['delivered_tps']):>7}  {fmt(summary['generated_tps']):>9}  "
+              f"{fmt(summary['aggregate_tps']):>9}  {fmt(summary['parse_ms'], '.2f'):>8}  "
+              f"{fmt(summary['flush_ms'], '.2f'):>8}")
+        for result in results:
+            if "error" in result:
+                print(f"      ❌ {result['error']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"model": args.model, "summaries": summaries, "requests": rows}, f, indent=2)
+    if args.csv:
+        fields = ["concurrency"]
+        for row in rows:
+            fields.extend(name for name in row if name not in fields)
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fields, restval="")
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
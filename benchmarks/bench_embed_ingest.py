@@ -0,0 +1,59 @@
+"""Compare one-chunk-per-request embedding against the batched, parallel EmbeddingPipeline.
+
+Needs a running Ollama server with an embedding model. Run from the repository root:
+
+    ollama pull nomic-embed-text
+    python benchmarks/bench_embed_ingest.py
+    python benchmarks/bench_embed_ingest.py --chunks 2000 --batch-size 16 64 --workers 1 2 4
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat_engine.client import get_client
+from chat_engine.ingest import EmbeddingPipeline
+from chat_engine.semantic_cache import EMBED_MODEL
+
+
+def chunks_for(num_chunks, chars):
+    words = [f"word{i % 211}" for i in range(chars // 8)]
+    return [(i, f"chunk {i}: " + " ".join(words)) for i in range(num_chunks)]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--model", default=EMBED_MODEL)
+    arg_parser.add_argument("--chunks", type=int, default=256)
+    arg_parser.add_argument("--chars", type=int, default=1500, help="Approximate characters per chunk")
+    arg_parser.add_argument("--batch-size", type=int, nargs="+", default=[8, 32])
+    arg_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = arg_parser.parse_args()
+
+    client = get_client()
+
+    def embed(texts):
+        return client.embed(model=args.model, input=texts)["embeddings"]
+
+    items = chunks_for(args.chunks, args.chars)
+    embed([items[0][1]])  # Load the model before timing
+
+    print(f"{args.chunks} chunks of ~{args.chars} characters with {args.model}")
+    print(f"{'batch':>6}  {'workers':>7}  {'seconds':>8}  {'chunks/s':>9}  {'retries':>7}")
+    start = time.perf_counter()
+    for _, text in items:
+        embed([text])
+    elapsed = time.perf_counter() - start
+    print(f"{1:>6}  {'serial':>7}  {elapsed:>8.2f}  {args.chunks / elapsed:>9.1f}  {0:>7}")
+
+    for batch_size in args.batch_size:
+        for workers in args.workers:
+            stats = EmbeddingPipeline(embed, batch_size, workers).run(items, lambda keys, texts, vectors: None)
+            print(f"{batch_size:>6}  {workers:>7}  {stats['seconds']:>8.2f}  {stats['chunks_per_sec']:>9.1f}  "
+                  f"{stats['retries']:>7}")
+
+
+if __name__ == "__main__":
+    main()
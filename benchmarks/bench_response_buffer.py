@@ -0,0 +1,87 @@
+"""Compare string concatenation against ResponseBuffer for building streamed responses.
+
+Run from the repository root:
+
+    python benchmarks/bench_response_buffer.py
+    python benchmarks/bench_response_buffer.py --tokens 2000 8000 32000 --render-every 16
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat_engine.buffer import ResponseBuffer
+
+
+def tokens_for(num_tokens):
+    return [f" token{i % 97}" for i in range(num_tokens)]
+
+
+def run_concat(tokens, render_every):
+    full_response = ""
+    rendered = 0
+    for i, content in enumerate(tokens, 1):
+        full_response += content
+        if i % render_every == 0:
+            rendered += len(full_response + "▌")
+    return full_response, rendered
+
+
+def run_buffer(tokens, render_every):
+    buffer = ResponseBuffer()
+    rendered = 0
+    for i, content in enumerate(tokens, 1):
+        buffer.append(content)
+        if i % render_every == 0:
+            rendered += len(buffer.render("▌"))
+    return buffer.getvalue(), rendered
+
+
+def run_buffer_tail(tokens, render_every):
+    buffer = ResponseBuffer()
+    rendered = 0
+    for i, content in enumerate(tokens, 1):
+        buffer.append(content)
+        if i % render_every == 0:
+            rendered += len(buffer.tail())
+    rendered += len(buffer.tail())
+    return buffer.getvalue(), rendered
+
+
+def measure(func, tokens, render_every):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(tokens, render_every)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--tokens", type=int, nargs="+", default=[1_000, 4_000, 16_000, 64_000])
+    arg_parser.add_argument("--render-every", type=int, default=1,
+                            help="Materialize the full text every N tokens, like a UI flush")
+    args = arg_parser.parse_args()
+
+    print(f"render every {args.render_every} token(s)")
+    print(f"{'tokens':>8}  {'concat (s)':>10}  {'buffer (s)':>10}  {'tail (s)':>10}  "
+          f"{'concat peak KiB':>15}  {'buffer peak KiB':>15}")
+    for num_tokens in args.tokens:
+        tokens = tokens_for(num_tokens)
+        concat_time, concat_peak, concat_result = measure(run_concat, tokens, args.render_every)
+        buffer_time, buffer_peak, buffer_result = measure(run_buffer, tokens, args.render_every)
+        tail_time, _, tail_result = measure(run_buffer_tail, tokens, args.render_every)
+        if concat_result != buffer_result or tail_result[0] != buffer_result[0] or tail_result[1] != len(tail_result[0]):
+            print(f"❌ Results differ for {num_tokens} tokens")
+            sys.exit(1)
+        print(f"{num_tokens:>8}  {concat_time:>10.4f}  {buffer_time:>10.4f}  {tail_time:>10.4f}  "
+              f"{concat_peak / 1024:>15.1f}  {buffer_peak / 1024:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Compare the incremental <think> parser against the per-chunk regex approach.
+
+Run from the repository root:
+
+    python benchmarks/bench_think_parser.py
+    python benchmarks/bench_think_parser.py --tokens 10000 50000 --skip-regex-above 20000
+
+The regex baseline is quadratic; at 100k tokens it takes minutes.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat_engine.think import ThinkStreamParser
+
+WORDS = ["the", "model", "reasons", "about", "tokens", "stream", "answer", "step", "so", "then", "<", ">", "/"]
+
+
+def synthetic_stream(num_tokens, think_ratio=0.6, seed=0):
+    """Build a DeepSeek-R1 style token stream with a long <think> block up front."""
+    rng = random.Random(seed)
+    think_tokens = int(num_tokens * think_ratio)
+    tokens = ["<th", "ink>"]
+    tokens += [" " + rng.choice(WORDS) for _ in range(think_tokens)]
+    tokens += ["</", "think", ">\n\n"]
+    tokens += [" " + rng.choice(WORDS) for _ in range(num_tokens - think_tokens)]
+    return tokens
+
+
+def run_regex(tokens):
+    full_response = ""
+    current_think = ""
+    for content in tokens:
+        full_response += content
+        think_match = re.search(r"<think>(.*?)</think>", full_response, re.DOTALL)
+        new_think = think_match.group(1).strip() if think_match and think_match.group(1).strip() else ""
+        if new_think != current_think:
+            current_think = new_think
+    response_text = re.sub(r"<think>.*?</think>", "", full_response, flags=re.DOTALL).strip()
+    return response_text, current_think
+
+
+def run_parser(tokens):
+    parser = ThinkStreamParser()
+    for content in tokens:
+        parser.feed(content)
+    parser.close()
+    return parser.answer, parser.think
+
+
+def timed(func, tokens):
+    start = time.perf_counter()
+    result = func(tokens)
+    return time.perf_counter() - start, result
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--tokens", type=int, nargs="+", default=[10_000, 50_000, 100_000])
+    arg_parser.add_argument("--skip-regex-above", type=int, default=None,
+                            help="Skip the quadratic regex baseline for streams longer than this")
+    args = arg_parser.parse_args()
+
+    print(f"{'tokens':>8}  {'regex (s)':>10}  {'parser (s)':>10}  {'speedup':>8}")
+    for num_tokens in args.tokens:
+        tokens = synthetic_stream(num_tokens)
+        parser_time, parser_result = timed(run_parser, tokens)
+        if args.skip_regex_above is not None and num_tokens > args.skip_regex_above:
+            print(f"{num_tokens:>8}  {'skipped':>10}  {parser_time:>10.4f}  {'-':>8}")
+            continue
+        regex_time, regex_result = timed(run_regex, tokens)
+        if regex_result != parser_result:
+            print(f"❌ Results differ for {num_tokens} tokens")
+            sys.exit(1)
+        print(f"{num_tokens:>8}  {regex_time:>10.4f}  {parser_time:>10.4f}  {regex_time / parser_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Compare VectorStore storage types: open time, search time, size on disk and recall against float32.
+
+Run from the repository root:
+
+    python benchmarks/bench_vector_search.py
+    python benchmarks/bench_vector_search.py --vectors 100000 500000 --dim 768 --k 8
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat_engine.vector_store import DTYPES, VectorStore
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--vectors", type=int, nargs="+", default=[10_000, 100_000])
+    arg_parser.add_argument("--dim", type=int, default=768)
+    arg_parser.add_argument("--k", type=int, default=4)
+    arg_parser.add_argument("--queries", type=int, default=20)
+    args = arg_parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+    print(f"{'vectors':>8}  {'dtype':>7}  {'open (ms)':>9}  {'search (ms)':>11}  {'MiB':>7}  {'recall':>6}")
+    for num_vectors in args.vectors:
+        data = rng.standard_normal((num_vectors, args.dim)).astype(np.float32)
+        expected = None
+        for dtype in DTYPES:
+            directory = tempfile.mkdtemp()
+            try:
+                store = VectorStore(directory, dtype)
+                for start in range(0, num_vectors, 10_000):
+                    store.append(np.arange(start, min(start + 10_000, num_vectors)), data[start:start + 10_000])
+
+                start = time.perf_counter()
+                store = VectorStore(directory)
+                store.search(queries[0], args.k)
+                open_ms = (time.perf_counter() - start) * 1000
+
+                start = time.perf_counter()
+                results = [{i for i, _ in store.search(query, args.k)} for query in queries]
+                search_ms = (time.perf_counter() - start) * 1000 / len(queries)
+                if expected is None:
+                    expected = results
+                recall = sum(len(r & e) for r, e in zip(results, expected)) / (args.k * len(queries))
+                print(f"{num_vectors:>8}  {dtype:>7}  {open_ms:>9.1f}  {search_ms:>11.2f}  "
+                      f"{store.stats()['bytes'] / 2 ** 20:>7.1f}  {recall:>6.2f}")
+            finally:
+                shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+"""A local stand-in for the Ollama HTTP API, for hermetic load and latency tests.
+
+Serves /api/chat, /api/generate, /api/tags, /api/show, /api/ps, /api/embed and
+/api/version with synthetic but deterministic output: the same prompt always
+gets the same reply. Token rate, time to first token, jitter, <think> blocks,
+failures and concurrency limits are configurable, so the app and the
+benchmarks can run without a GPU or a downloaded model:
+
+    python benchmarks/fake_ollama.py --port 11435 --tokens-per-sec 40 --ttft-ms 300
+    OLLAMA_HOST=127.0.0.1:11435 streamlit run chatapp.py
+
+Like Ollama, at most --num-parallel generations run at once and up to
+--max-queue more wait; beyond that requests get HTTP 503.
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+WORDS = (
+    "the model answers questions about local language models running on a single machine with "
+    "streaming tokens caching context windows and careful reasoning so every reply stays short clear and useful"
+).split()
+THINK_WORDS = "first let me consider what the user asked then check the facts and plan a short answer".split()
+
+
+@dataclass
+class FakeConfig:
+    models: list = field(default_factory=lambda: ["deepseek-r1:1.5b", "llama3:latest", "nomic-embed-text:latest"])
+    tokens_per_sec: float = 50.0
+    ttft_ms: float = 150.0
+    jitter: float = 0.2
+    reply_tokens: int = 48
+    think_tokens: int = 24
+    # "auto" emits <think> blocks for deepseek-r1 models only
+    think: str = "auto"
+    failure_rate: float = 0.0
+    num_parallel: int = 4
+    max_queue: int = 512
+    num_ctx: int = 4096
+    embed_dim: int = 384
+    seed: int = 0
+
+
+def _stable_seed(*parts):
+    return int.from_bytes(hashlib.sha256("\x00".join(map(str, parts)).encode("utf-8")).digest()[:8], "big")
+
+
+def embed_text(text, dim, seed=0):
+    """Bag-of-words feature hashing: texts that share words get similar unit vectors."""
+    vector = np.zeros(dim, dtype=np.float32)
+    for word in text.lower().split():
+        vector += np.random.default_rng(_stable_seed(seed, word)).standard_normal(dim).astype(np.float32)
+    norm = np.linalg.norm(vector)
+    return (vector / norm if norm else vector).tolist()
+
+
+def full_name(name):
+    """Ollama's reading of a model name: without a tag it means `<name>:latest`."""
+    return name if ":" in name else f"{name}:latest"
+
+
+class FakeOllama:
+    """State shared by all request handlers: config, admission control and counters."""
+
+    def __init__(self, config):
+        self.config = config
+        self._slots = threading.Semaphore(config.num_parallel)
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.active = 0
+        self.requests = 0
+        self.rejected = 0
+        self.failed = 0
+        self.loaded = {}
+        self._sequence = 0
+
+    def request_rng(self):
+        """A per-request RNG for jitter and failures; the nth request always draws the same values."""
+        with self._lock:
+            self._sequence += 1
+            return random.Random(_stable_seed(self.config.seed, "request", self._sequence))
+
+    def admit(self):
+        """Take a generation slot, waiting like Ollama does; False if the queue is full."""
+        with self._lock:
+            self.requests += 1
+            if self.waiting >= self.config.max_queue:
+                self.rejected += 1
+                return False
+            self.waiting += 1
+        self._slots.acquire()
+        with self._lock:
+            self.waiting -= 1
+            self.active += 1
+        return True
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+        self._slots.release()
+
+    def should_fail(self, rng):
+        if rng.random() < self.config.failure_rate:
+            with self._lock:
+                self.failed += 1
+            return True
+        return False
+
+    def tokens(self, model, prompt):
+        """The deterministic token list for a prompt, with a <think> block if configured."""
+        rng = random.Random(_stable_seed(self.config.seed, model, prompt))
+        think = self.config.think == "always" or (self.config.think == "auto" and model.startswith("deepseek-r1"))
+        tokens = []
+        if think:
+            tokens += ["<think>", "\n"] + [" " + rng.choice(THINK_WORDS) for _ in range(self.config.think_tokens)]
+            tokens += ["\n", "</think>", "\n\n"]
+        words = [rng.choice(WORDS) for _ in range(self.config.reply_tokens)]
+        tokens += [words[0].capitalize()] + [" " + word for word in words[1:]] + ["."]
+        return tokens
+
+    def installed(self, name):
+        """The listed model that `name` refers to, or None."""
+        name = full_name(name)
+        for model in self.config.models:
+            if full_name(model) == name:
+                return model
+        return None
+
+    def model_entry(self, name):
+        name = self.installed(name) or full_name(name)
+        digest = hashlib.sha256(name.encode("utf-8")).hexdigest()
+        family = name.split(":")[0].split("-")[0]
+        return {
+            "name": name,
+            "model": name,
+            "modified_at": "2024-01-01T00:00:00Z",
+            "size": 1_000_000_000,
+            "digest": digest,
+            "details": {"format": "gguf", "family": family, "parameter_size": "1.5B", "quantization_level": "Q4_K_M"},
+        }
+
+    def touch(self, model):
+        with self._lock:
+            self.loaded[model] = time.time()
+
+
+def make_handler(fake):
+    config = fake.config
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _json(self, obj, status=200):
+            body = json.dumps(obj).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _error(self, status, message):
+            self._json({"error": message}, status)
+
+        def _chunk(self, obj):
+            data = (json.dumps(obj) + "\n").encode("utf-8")
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+
+        def do_GET(self):
+            if self.path == "/api/tags":
+                self._json({"models": [fake.model_entry(name) for name in config.models]})
+            elif self.path == "/api/ps":
+                now = datetime.now(timezone.utc)
+                with fake._lock:
+                    loaded = list(fake.loaded)
+                models = [dict(fake.model_entry(name), expires_at=(now + timedelta(minutes=5)).isoformat(),
+                               size_vram=1_000_000_000) for name in loaded]
+                self._json({"models": models})
+            elif self.path == "/api/version":
+                self._json({"version": "0.0.0-fake"})
+            elif self.path == "/":
+                body = b"Ollama is running"
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            else:
+                self._error(404, "not found")
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            requested = body.get("model") or body.get("name") or ""
+            model = fake.installed(requested)
+            if self.path not in ("/api/show", "/api/chat", "/api/generate", "/api/embed"):
+                self._error(404, "not found")
+            elif model is None:
+                self._error(404, f"model '{requested}' not found, try pulling it first")
+            elif self.path == "/api/show":
+                entry = fake.model_entry(model)
+                self._json({
+                    "modified_at": entry["modified_at"],
+                    "details": entry["details"],
+                    "parameters": f"num_ctx {config.num_ctx}",
+                    "template": "{{ .Prompt }}",
+                    "model_info": {f"{entry['details']['family']}.context_length": config.num_ctx},
+                })
+            elif self.path == "/api/embed":
+                inputs = body.get("input") or []
+                inputs = [inputs] if isinstance(inputs, str) else inputs
+                fake.touch(model)
+                self._json({"model": model, "embeddings": [embed_text(text, config.embed_dim, config.seed)
+                                                           for text in inputs]})
+            else:
+                self.generate(model, body)
+
+        def generate(self, model, body):
+            chat = self.path == "/api/chat"
+            if chat:
+                messages = body.get("messages") or []
+                prompt = "\n".join(m.get("content", "") for m in messages)
+            else:
+                prompt = body.get("prompt", "")
+            rng = fake.request_rng()
+            if not fake.admit():
+                self._error(503, "server busy, please try again.  maximum pending requests exceeded")
+                return
+            try:
+                if fake.should_fail(rng):
+                    self._error(500, "fake failure injected by --failure-rate")
+                    return
+                fake.touch(model)
+                self.stream(model, prompt, chat, body.get("stream", True), rng)
+            except (BrokenPipeError, ConnectionResetError):
+                # The client hung up (e.g. a cancelled stream); stop generating like Ollama does
+                pass
+            finally:
+                fake.release()
+
+        def stream(self, model, prompt, chat, streaming, rng):
+            started = time.perf_counter()
+            tokens = fake.tokens(model, prompt)
+            interval = 1.0 / config.tokens_per_sec if config.tokens_per_sec > 0 else 0.0
+
+            def jittered(seconds):
+                return max(seconds * (1 + rng.uniform(-config.jitter, config.jitter)), 0.0)
+
+            def message(text):
+                if chat:
+                    return {"message": {"role": "assistant", "content": text}}
+                return {"response": text}
+
+            prompt_eval = jittered(config.ttft_ms / 1000)
+            time.sleep(prompt_eval)
+            eval_started = time.perf_counter()
+            if streaming:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for i, token in enumerate(tokens):
+                    if i:
+                        time.sleep(jittered(interval))
+                    self._chunk(dict(model=model, created_at=datetime.now(timezone.utc).isoformat(),
+                                     done=False, **message(token)))
+            else:
+                time.sleep(jittered(interval) * max(len(tokens) - 1, 0))
+            eval_duration = time.perf_counter() - eval_started
+            final = dict(
+                model=model,
+                created_at=datetime.now(timezone.utc).isoformat(),
+                done=True,
+                done_reason="stop",
+                total_duration=int((time.perf_counter() - started) * 1e9),
+                load_duration=0,
+                prompt_eval_count=len(prompt) // 4 + 1,
+                prompt_eval_duration=int(prompt_eval * 1e9),
+                eval_count=len(tokens),
+                eval_duration=int(eval_duration * 1e9),
+                **message("" if streaming else "".join(tokens)),
+            )
+            if streaming:
+                self._chunk(final)
+                self.wfile.write(b"0\r\n\r\n")
+            else:
+                self._json(final)
+
+    return Handler
+
+
+def make_server(config=None, host="127.0.0.1", port=11435):
+    """A ready-to-run fake server; call `serve_forever()` (or use `start()` for a background thread)."""
+    fake = FakeOllama(config or FakeConfig())
+    server = ThreadingHTTPServer((host, port), make_handler(fake))
+    server.daemon_threads = True
+    server.fake = fake
+    return server
+
+
+def start(config=None, host="127.0.0.1", port=0):
+    """Start a fake server on a background thread and return it; `server.server_address` has the port."""
+    server = make_server(config, host, port)
+    threading.Thread(target=server.serve_forever, name="fake-ollama", daemon=True).start()
+    return server
+
+
+def main():
+    defaults = FakeConfig()
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=11435)
+    arg_parser.add_argument("--models", nargs="+", default=defaults.models)
+    arg_parser.add_argument("--tokens-per-sec", type=float, default=defaults.tokens_per_sec)
+    arg_parser.add_argument("--ttft-ms", type=float, default=defaults.ttft_ms)
+    arg_parser.add_argument("--jitter", type=float, default=defaults.jitter,
+                            help="Random +/- fraction applied to the TTFT and every token interval")
+    arg_parser.add_argument("--reply-tokens", type=int, default=defaults.reply_tokens)
+    arg_parser.add_argument("--think-tokens", type=int, default=defaults.think_tokens)
+    arg_parser.add_argument("--think", choices=["auto", "always", "never"], default=defaults.think)
+    arg_parser.add_argument("--failure-rate", type=float, default=defaults.failure_rate,
+                            help="Fraction of generation requests answered with HTTP 500")
+    arg_parser.add_argument("--num-parallel", type=int, default=defaults.num_parallel)
+    arg_parser.add_argument("--max-queue", type=int, default=defaults.max_queue)
+    arg_parser.add_argument("--num-ctx", type=int, default=defaults.num_ctx)
+    arg_parser.add_argument("--embed-dim", type=int, default=defaults.embed_dim)
+    arg_parser.add_argument("--seed", type=int, default=defaults.seed)
+    args = arg_parser.parse_args()
+
+    config = FakeConfig(**{name: value for name, value in vars(args).items() if name not in ("host", "port")})
+    server = make_server(config, args.host, args.port)
+    print(f"Fake Ollama listening on http://{args.host}:{args.port} with models {', '.join(config.models)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
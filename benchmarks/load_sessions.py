@@ -0,0 +1,429 @@
+"""Simulate concurrent chat sessions against one Streamlit server and measure how it holds up.
+
+Each simulated user talks to the app over the same websocket protocol as a
+browser: it loads the page, then sends prompts with think time in between,
+each followed by a plain rerun (like clicking a widget). For every number of
+sessions it reports rerun latency, time to the first streamed text, delivered
+tokens/sec, the server process's CPU and RSS, and a breakdown of each prompt
+rerun into phases as the browser sees them:
+
+    before_text  request sent -> first streamed text (history, retrieval, caches, queue, TTFT)
+    streaming    first -> last streamed text update
+    after_reply  last text update -> first sidebar element (sources, caption, saving the reply)
+    sidebar      first sidebar element -> script finished
+
+By default the app is launched on a free port against a fake Ollama server
+(benchmarks/fake_ollama.py), so results don't depend on a GPU:
+
+    python benchmarks/load_sessions.py --sessions 1 5 10 20
+    python benchmarks/load_sessions.py --app llamma.py --prompts-per-session 5 --think-time 2 --json load.json
+    python benchmarks/load_sessions.py --ollama-host 127.0.0.1:11434 --csv load.csv
+    python benchmarks/load_sessions.py --url http://localhost:8501 --pid 12345   # an app that is already running
+
+--profile turns on the app's rerun profiler (CHAT_PROFILE) in the launched
+server and adds its per-section timings, measured inside the script, to the
+report.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.RootContainer_pb2 import RootContainer
+from tornado.websocket import websocket_connect
+
+import fake_ollama
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PROMPTS = [
+    "Say hello in one short sentence.",
+    "What is the capital of France?",
+    "Explain what a hash map is in two sentences.",
+    "Write a haiku about local language models.",
+]
+# RenderScheduler draws this cursor after text that is still streaming
+CURSOR = "▌"
+# Token count in the caption under each reply
+TOKENS_CAPTION = re.compile(r"for (\d+) tokens")
+PHASES = ("before_text", "streaming", "after_reply", "sidebar")
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * q / 100), len(values) - 1)]
+
+
+def mean(values):
+    return sum(values) / len(values) if values else None
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class ProcessSampler:
+    """CPU utilization and RSS of a process, read from /proc (Linux only)."""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+        self.samples = []
+        self._last = None
+
+    def _read(self):
+        try:
+            with open(f"/proc/{self.pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            with open(f"/proc/{self.pid}/status") as f:
+                rss = next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmRSS:"))
+        except (OSError, StopIteration):
+            return None
+        # utime and stime are fields 14 and 15 of /proc/<pid>/stat
+        return time.perf_counter(), (int(fields[11]) + int(fields[12])) / self.ticks, rss
+
+    def sample(self):
+        reading = self._read()
+        if reading is None:
+            return
+        if self._last is not None:
+            elapsed = reading[0] - self._last[0]
+            cpu = (reading[1] - self._last[1]) / elapsed * 100 if elapsed > 0 else 0.0
+            self.samples.append((cpu, reading[2]))
+        self._last = reading
+
+    def reset(self):
+        self.samples = []
+        self._last = None
+        self.sample()
+
+    def stats(self):
+        cpu = [c for c, _ in self.samples]
+        rss = [r for _, r in self.samples]
+        return {
+            "cpu_avg_pct": mean(cpu),
+            "cpu_max_pct": max(cpu) if cpu else None,
+            "rss_max_mib": max(rss) / 2 ** 20 if rss else None,
+        }
+
+
+class Session:
+    """One simulated browser tab."""
+
+    def __init__(self, url, timeout):
+        self.url = url.replace("http", "ws", 1).rstrip("/") + "/_stcore/stream"
+        self.timeout = timeout
+        self.connection = None
+        self.chat_input_id = None
+        self.query_string = ""
+
+    async def connect(self):
+        self.connection = await websocket_connect(self.url, subprotocols=["streamlit"], max_message_size=256 * 2 ** 20)
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+
+    async def rerun(self, prompt=None):
+        """Request a rerun (submitting `prompt` in the chat input, if given) and time it until the script finishes."""
+        msg = BackMsg()
+        msg.rerun_script.query_string = self.query_string
+        msg.rerun_script.page_script_hash = ""
+        if prompt is not None:
+            widget = msg.rerun_script.widget_states.widgets.add()
+            widget.id = self.chat_input_id
+            widget.string_trigger_value.data = prompt
+        started = time.perf_counter()
+        await self.connection.write_message(msg.SerializeToString(), binary=True)
+
+        result = {"deltas": 0, "error": None}
+        first_text = last_text = first_sidebar = None
+        deadline = started + self.timeout
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                raise TimeoutError(f"Rerun did not finish within {self.timeout:.0f}s")
+            payload = await asyncio.wait_for(self.connection.read_message(), remaining)
+            if payload is None:
+                raise ConnectionError("The server closed the connection")
+            now = time.perf_counter()
+            forward = ForwardMsg()
+            forward.ParseFromString(payload)
+            kind = forward.WhichOneof("type")
+            if kind == "page_info_changed":
+                self.query_string = forward.page_info_changed.query_string
+            elif kind == "script_finished":
+                if forward.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    continue
+                break
+            elif kind == "delta":
+                result["deltas"] += 1
+                element = forward.delta.new_element
+                field = element.WhichOneof("type") if forward.delta.WhichOneof("type") == "new_element" else None
+                container = forward.metadata.delta_path[0] if forward.metadata.delta_path else RootContainer.MAIN
+                if container == RootContainer.SIDEBAR and first_sidebar is None:
+                    first_sidebar = now
+                if field == "chat_input":
+                    self.chat_input_id = element.chat_input.id
+                elif field == "exception":
+                    result["error"] = element.exception.message
+                elif field == "alert" and element.alert.format == element.alert.ERROR and result["error"] is None:
+                    result["error"] = element.alert.body
+                elif field == "markdown" and container == RootContainer.MAIN:
+                    if element.markdown.body.endswith(CURSOR):
+                        first_text = first_text if first_text is not None else now
+                        last_text = now
+                    elif element.markdown.is_caption:
+                        tokens = TOKENS_CAPTION.search(element.markdown.body)
+                        if tokens:
+                            result["tokens"] = int(tokens.group(1))
+        finished = time.perf_counter()
+
+        result["latency_ms"] = (finished - started) * 1000
+        if first_text is not None:
+            sidebar_at = first_sidebar if first_sidebar is not None and first_sidebar > last_text else finished
+            result["first_text_ms"] = (first_text - started) * 1000
+            result["before_text_ms"] = result["first_text_ms"]
+            result["streaming_ms"] = (last_text - first_text) * 1000
+            result["after_reply_ms"] = (sidebar_at - last_text) * 1000
+            result["sidebar_ms"] = (finished - sidebar_at) * 1000
+            if result.get("tokens") and last_text > first_text:
+                result["tok_per_sec"] = result["tokens"] / (last_text - first_text)
+        return result
+
+
+async def run_session(index, url, prompts, args, rng, rows):
+    """Load the app, then alternate prompts (with think time) and plain reruns."""
+    session = Session(url, args.timeout)
+
+    def record(kind, result):
+        rows.append(dict(session=index, kind=kind, **result))
+
+    try:
+        await asyncio.sleep(args.ramp * index / max(args.level, 1))
+        await session.connect()
+        record("load", await session.rerun())
+        for turn in range(args.prompts_per_session):
+            await asyncio.sleep(args.think_time * rng.uniform(0.5, 1.5))
+            if session.chat_input_id is None:
+                raise RuntimeError("The app did not render a chat input")
+            record("prompt", await session.rerun(prompts[(index + turn) % len(prompts)]))
+            for _ in range(args.idle_reruns):
+                record("rerun", await session.rerun())
+    except Exception as e:
+        record("error", {"latency_ms": None, "deltas": 0, "error": f"{type(e).__name__}: {e}"})
+    finally:
+        session.close()
+
+
+async def sample_until(sampler, done, interval=0.5):
+    while not done.is_set():
+        sampler.sample()
+        try:
+            await asyncio.wait_for(done.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+    sampler.sample()
+
+
+async def run_level(url, prompts, args, sampler):
+    rows = []
+    rng = random.Random(args.seed + args.level)
+    done = asyncio.Event()
+    monitor = None
+    if sampler is not None:
+        sampler.reset()
+        monitor = asyncio.ensure_future(sample_until(sampler, done))
+    started = time.perf_counter()
+    await asyncio.gather(*(run_session(i, url, prompts, args, rng, rows) for i in range(args.level)))
+    wall = time.perf_counter() - started
+    done.set()
+    if monitor is not None:
+        await monitor
+    return rows, wall
+
+
+def summarize(sessions, rows, wall, process_stats):
+    def values(kind, name):
+        return [r[name] for r in rows if r["kind"] == kind and r.get(name) is not None]
+
+    summary = {
+        "sessions": sessions,
+        "interactions": len(rows),
+        "errors": sum(1 for r in rows if r.get("error")),
+        "load_p50_ms": percentile(values("load", "latency_ms"), 50),
+        "prompt_p50_ms": percentile(values("prompt", "latency_ms"), 50),
+        "prompt_p95_ms": percentile(values("prompt", "latency_ms"), 95),
+        "rerun_p50_ms": percentile(values("rerun", "latency_ms"), 50),
+        "rerun_p95_ms": percentile(values("rerun", "latency_ms"), 95),
+        "first_text_p50_ms": percentile(values("prompt", "first_text_ms"), 50),
+        "first_text_p95_ms": percentile(values("prompt", "first_text_ms"), 95),
+        "tok_per_sec": mean(values("prompt", "tok_per_sec")),
+        "aggregate_tok_per_sec": sum(values("prompt", "tokens")) / wall if wall > 0 else None,
+        "wall_s": wall,
+    }
+    for phase in PHASES:
+        summary[f"{phase}_ms"] = mean(values("prompt", f"{phase}_ms"))
+    summary.update(process_stats)
+    return summary
+
+
+def fmt(value, spec=".0f"):
+    return "N/A" if value is None else format(value, spec)
+
+
+def wait_until_healthy(url, process, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"The Streamlit server exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"{url}/_stcore/health", timeout=2) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"The Streamlit server at {url} did not come up within {timeout}s")
+
+
+def launch_app(args, workdir):
+    """Start `streamlit run` for the app under test and return (url, process)."""
+    fake = None
+    env = dict(os.environ)
+    if args.ollama_host:
+        env["OLLAMA_HOST"] = args.ollama_host
+    else:
+        fake = fake_ollama.start(fake_ollama.FakeConfig(tokens_per_sec=args.fake_tokens_per_sec,
+                                                        ttft_ms=args.fake_ttft_ms))
+        env["OLLAMA_HOST"] = "127.0.0.1:%d" % fake.server_address[1]
+    # Keep the load test's conversations out of the real history database
+    env.setdefault("CHAT_DB_PATH", os.path.join(workdir, "chat_history.db"))
+    if args.profile:
+        env.update(CHAT_PROFILE="1", CHAT_PROFILE_DUMP=os.path.join(workdir, "profile.json"),
+                   CHAT_PROFILE_DUMP_INTERVAL="0")
+    port = free_port()
+    command = [sys.executable, "-m", "streamlit", "run", os.path.join(ROOT, args.app),
+               "--server.headless", "true", "--server.port", str(port), "--server.fileWatcherType", "none",
+               "--browser.gatherUsageStats", "false"]
+    with open(os.path.join(workdir, "streamlit.log"), "w") as log:
+        process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+    return f"http://127.0.0.1:{port}", process, fake
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--app", default="chatapp.py", help="Entry point to launch (chatapp.py, llamma.py, models.py)")
+    arg_parser.add_argument("--url", default=None, help="Test an app that is already running instead of launching one")
+    arg_parser.add_argument("--pid", type=int, default=None, help="Process id of the --url server, for CPU/RSS")
+    arg_parser.add_argument("--ollama-host", default=None, help="Use this Ollama server instead of a fake one")
+    arg_parser.add_argument("--fake-tokens-per-sec", type=float, default=50.0)
+    arg_parser.add_argument("--fake-ttft-ms", type=float, default=150.0)
+    arg_parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10])
+    arg_parser.add_argument("--prompts", default=None, help="Text file with one prompt per line")
+    arg_parser.add_argument("--prompts-per-session", type=int, default=3)
+    arg_parser.add_argument("--think-time", type=float, default=1.0,
+                            help="Mean seconds a user waits before the next prompt (uniform, +/- 50%%)")
+    arg_parser.add_argument("--idle-reruns", type=int, default=1, help="Plain reruns after each prompt")
+    arg_parser.add_argument("--ramp", type=float, default=1.0, help="Seconds over which sessions connect")
+    arg_parser.add_argument("--timeout", type=float, default=120.0, help="Longest wait for one rerun")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--profile", action="store_true",
+                            help="Profile reruns inside the launched app and report time per script section")
+    arg_parser.add_argument("--json", default=None, help="Write summaries and per-interaction results as JSON")
+    arg_parser.add_argument("--csv", default=None, help="Write per-interaction results as CSV")
+    args = arg_parser.parse_args()
+
+    prompts = DEFAULT_PROMPTS
+    if args.prompts:
+        with open(args.prompts, encoding="utf-8") as f:
+            prompts = [line.strip() for line in f if line.strip()]
+
+    process = fake = server_profile = None
+    workdir = tempfile.mkdtemp(prefix="load_sessions_")
+    try:
+        if args.url:
+            url, pid = args.url.rstrip("/"), args.pid
+        else:
+            url, process, fake = launch_app(args, workdir)
+            pid = process.pid
+        wait_until_healthy(url, process)
+        sampler = ProcessSampler(pid) if pid and os.path.exists(f"/proc/{pid}") else None
+
+        print(f"{args.app if not args.url else url}: {args.prompts_per_session} prompts per session, "
+              f"think time {args.think_time:g}s")
+        print(f"{'sess':>4}  {'err':>3}  {'load p50':>8}  {'prompt p50':>10}  {'prompt p95':>10}  {'rerun p50':>9}  "
+              f"{'rerun p95':>9}  {'text p50':>8}  {'text p95':>8}  {'tok/s':>6}  {'agg tok/s':>9}  "
+              f"{'CPU avg':>7}  {'CPU max':>7}  {'RSS MiB':>7}")
+        summaries = []
+        all_rows = []
+        loop = asyncio.new_event_loop()
+        for sessions in args.sessions:
+            args.level = sessions
+            rows, wall = loop.run_until_complete(run_level(url, prompts, args, sampler))
+            summary = summarize(sessions, rows, wall, sampler.stats() if sampler else {})
+            summaries.append(summary)
+            all_rows.extend(dict(row, sessions=sessions) for row in rows)
+            print(f"{sessions:>4}  {summary['errors']:>3}  {fmt(summary['load_p50_ms']):>8}  "
+                  f"{fmt(summary['prompt_p50_ms']):>10}  {fmt(summary['prompt_p95_ms']):>10}  "
+                  f"{fmt(summary['rerun_p50_ms']):>9}  {fmt(summary['rerun_p95_ms']):>9}  "
+                  f"{fmt(summary['first_text_p50_ms']):>8}  {fmt(summary['first_text_p95_ms']):>8}  "
+                  f"{fmt(summary['tok_per_sec'], '.1f'):>6}  {fmt(summary['aggregate_tok_per_sec'], '.1f'):>9}  "
+                  f"{fmt(summary.get('cpu_avg_pct')):>6}%  {fmt(summary.get('cpu_max_pct')):>6}%  "
+                  f"{fmt(summary.get('rss_max_mib')):>7}")
+            print("      phases (ms): " + ", ".join(f"{phase} {fmt(summary[f'{phase}_ms'])}" for phase in PHASES))
+            for error in sorted({row["error"] for row in rows if row.get("error")}):
+                print(f"      ❌ {error}")
+        loop.close()
+
+        profile_path = os.path.join(workdir, "profile.json")
+        if args.profile and os.path.exists(profile_path):
+            with open(profile_path, encoding="utf-8") as f:
+                server_profile = json.load(f)
+            print(f"\nserver-side sections over {server_profile['reruns']} reruns (ms):")
+            print(f"{'section':>18}  {'runs':>5}  {'p50':>7}  {'p95':>7}  {'max':>7}  {'share':>5}")
+            sections = sorted(server_profile["sections"].items(), key=lambda item: item[1]["share"], reverse=True)
+            for name, summary in sections:
+                print(f"{name:>18}  {summary['count']:>5}  {summary['p50_ms']:>7.1f}  {summary['p95_ms']:>7.1f}  "
+                      f"{summary['max_ms']:>7.1f}  {summary['share']:>5.0%}")
+            for endpoint, summary in server_profile["calls"].items():
+                print(f"{endpoint:>18}  {summary['count']:>5}  {summary['p50_ms']:>7.1f}  {summary['p95_ms']:>7.1f}  "
+                      f"{summary['max_ms']:>7.1f}")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+        if fake is not None:
+            fake.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"app": args.url or args.app, "summaries": summaries, "interactions": all_rows,
+                       "server_profile": server_profile}, f, indent=2)
+    if args.csv:
+        fields = ["sessions", "session", "kind"]
+        for row in all_rows:
+            fields.extend(name for name in row if name not in fields)
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fields, restval="")
+            writer.writeheader()
+            writer.writerows(all_rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+"""Headless chat engine shared by the Streamlit apps.
+
+Everything except `chat_engine.ui` can be imported without Streamlit, so
+the streaming, think-parsing and caching code can be benchmarked on its own.
+"""
+from .async_client import ChatStream, start_chat
+from .buffer import ResponseBuffer
+from .cassette import Cassette, ReplayStream, Track
+from .catalog import ModelCatalog
+from .client import get_client, make_async_client, make_client
+from .history import ChatMessage, ConversationMemory
+from .ingest import EmbeddingPipeline
+from .metrics import REGISTRY, MetricsServer, record_reply
+from .profiler import SectionProfiler
+from .profiles import DEEPSEEK_R1, LLAMA3, PROFILES, ModelProfile
+from .rag import DocumentIndex, Passage, chunk_text
+from .response_cache import ResponseCache, cache_key, replay_stream
+from .scheduler import QueueFull, RequestScheduler
+from .semantic_cache import SemanticCache
+from .store import ConversationStore
+from .streaming import RenderScheduler, Reply, ReplyPipeline
+from .think import ANSWER, THINK, ThinkStreamParser, parse_stream, split_think
+from .vector_store import VectorStore
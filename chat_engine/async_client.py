@@ -0,0 +1,91 @@
+import asyncio
+import queue
+import threading
+
+from .client import make_async_client
+
+# Seconds the consuming thread waits for a chunk before calling `on_idle`
+IDLE_POLL_INTERVAL = 0.1
+
+_DONE = object()
+
+_loop = None
+_async_client = None
+_lock = threading.Lock()
+
+
+def get_event_loop():
+    """The process-wide asyncio loop that runs every async Ollama request, on a daemon thread."""
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="ollama-async-loop", daemon=True).start()
+        return _loop
+
+
+def get_async_client():
+    """The shared pooled `ollama.AsyncClient`; only ever used from the background loop."""
+    global _async_client
+    with _lock:
+        if _async_client is None:
+            _async_client = make_async_client()
+        return _async_client
+
+
+class ChatStream:
+    """Iterate an `AsyncClient.chat(stream=True)` response from synchronous code.
+
+    The request runs as a task on the background loop and hands chunks over
+    through a queue. `cancel()` cancels that task, which closes the HTTP
+    response so Ollama stops generating and frees the slot right away,
+    instead of the abandoned synchronous iterator running to completion.
+    """
+
+    def __init__(self, model, messages, client=None, on_idle=None, **kwargs):
+        self.on_idle = on_idle
+        self.cancelled = False
+        self._client = client
+        self._queue = queue.SimpleQueue()
+        self._future = asyncio.run_coroutine_threadsafe(self._run(model, messages, kwargs), get_event_loop())
+
+    async def _run(self, model, messages, kwargs):
+        client = self._client or get_async_client()
+        try:
+            response_stream = await client.chat(model=model, messages=messages, stream=True, **kwargs)
+            async for chunk in response_stream:
+                self._queue.put(chunk)
+        except asyncio.CancelledError:
+            self._queue.put(_DONE)
+            raise
+        except Exception as e:
+            self._queue.put(e)
+        else:
+            self._queue.put(_DONE)
+
+    def __iter__(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=IDLE_POLL_INTERVAL)
+            except queue.Empty:
+                if self.on_idle is not None:
+                    self.on_idle()
+                continue
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def cancel(self):
+        """Abort the request; safe to call more than once or after the stream finished."""
+        if not self._future.done():
+            self.cancelled = True
+            self._future.cancel()
+        # Wake up a consumer that is still waiting on the queue
+        self._queue.put(_DONE)
+
+
+def start_chat(model, messages, client=None, on_idle=None, **kwargs):
+    """Start a cancellable streamed chat request on the background loop."""
+    return ChatStream(model, messages, client=client, on_idle=on_idle, **kwargs)
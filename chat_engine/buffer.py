@@ -0,0 +1,53 @@
+class ResponseBuffer:
+    """Append-only buffer for a streamed response.
+
+    New chunks are collected in a list and only folded into the
+    materialized string when the full text is asked for, so appends are
+    O(1) and the joined value is cached until the next append. `tail()`
+    returns just the text since the last flush without materializing the
+    whole response.
+    """
+
+    def __init__(self):
+        self._value = ""
+        self._pending = []
+        self._length = 0
+        self._flushed = 0
+        self._flushed_part = 0
+
+    def append(self, text):
+        if text:
+            self._pending.append(text)
+            self._length += len(text)
+
+    def getvalue(self):
+        """Materialize the full response (cached until the next append)."""
+        if self._pending:
+            self._pending.insert(0, self._value)
+            self._value = "".join(self._pending)
+            self._pending = []
+            self._flushed_part = 0
+        return self._value
+
+    def tail(self):
+        """Return the text appended since the previous call, and mark it flushed."""
+        if self._flushed < len(self._value):
+            new_text = self._value[self._flushed:] + "".join(self._pending)
+        else:
+            new_text = "".join(self._pending[self._flushed_part:])
+        self._flushed = self._length
+        self._flushed_part = len(self._pending)
+        return new_text
+
+    def render(self, cursor=""):
+        """Full text with an optional trailing cursor for in-progress display."""
+        return self.getvalue() + cursor
+
+    def __len__(self):
+        return self._length
+
+    def __bool__(self):
+        return self._length > 0
+
+    def __str__(self):
+        return self.getvalue()
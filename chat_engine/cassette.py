@@ -0,0 +1,200 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+from .response_cache import normalize_text
+
+# Record every streamed reply to this file, or replay from it instead of calling Ollama
+CASSETTE_PATH = os.getenv("CHAT_CASSETTE")
+CASSETTE_MODE = os.getenv("CHAT_CASSETTE_MODE", "record")
+# Replay speed: 1 plays chunks at their recorded pace, 10 ten times faster, 0 as fast as possible
+REPLAY_SPEED = float(os.getenv("CHAT_REPLAY_SPEED", "1"))
+# Longest sleep between `on_idle` calls while a replayed chunk is not due yet
+IDLE_POLL_INTERVAL = 0.1
+
+
+def track_key(model, messages):
+    """Identifies a request, ignoring whitespace differences in the messages."""
+    payload = [model, [[m["role"], normalize_text(m["content"])] for m in messages]]
+    return hashlib.sha256(json.dumps(payload).encode("utf-8")).hexdigest()
+
+
+def _as_dict(chunk):
+    # ollama>=0.4 streams pydantic models; older versions and our own replays use dicts
+    if hasattr(chunk, "model_dump"):
+        return chunk.model_dump(exclude_none=True)
+    return dict(chunk)
+
+
+def encode_chunk(chunk):
+    """Plain content chunks are stored as their text alone; anything else (e.g. the final chunk) in full."""
+    chunk = _as_dict(chunk)
+    message = chunk.get("message") or {}
+    if not chunk.get("done") and set(message) <= {"role", "content"} and set(chunk) <= {
+            "model", "created_at", "message", "done"}:
+        return message.get("content", "")
+    return chunk
+
+
+def decode_chunk(model, data):
+    if isinstance(data, str):
+        return {"model": model, "message": {"role": "assistant", "content": data}, "done": False}
+    return data
+
+
+@dataclass
+class Track:
+    """One recorded stream: its chunks with the microseconds since the previous one.
+
+    The first delay is measured from the moment the request was sent, so it
+    includes the time to first token.
+    """
+
+    model: str
+    key: str
+    chunks: list = field(default_factory=list)
+    recorded_at: float = 0.0
+
+    @property
+    def ttft(self):
+        return self.chunks[0][0] / 1e6 if self.chunks else None
+
+    @property
+    def duration(self):
+        return sum(delay for delay, _ in self.chunks) / 1e6
+
+
+class Cassette:
+    """A file of recorded `ollama.chat` streams that can be played back later.
+
+    Tracks are appended as gzip members of newline-delimited JSON, so a
+    recording session only ever appends and an interrupted one loses at most
+    the reply in flight. Replays look a request up by model and messages and,
+    failing that, cycle through the recordings of the same model, so a
+    cassette recorded with one set of prompts can drive any other.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._next = {}
+        self.tracks = []
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+        if os.path.exists(path):
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self.tracks.append(Track(**json.loads(line)))
+
+    def add(self, track):
+        line = json.dumps(track.__dict__, separators=(",", ":")) + "\n"
+        with self._lock:
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(line)
+            self.tracks.append(track)
+            self.recorded += 1
+
+    def record(self, stream, model, messages, clock=time.perf_counter):
+        """Wrap a stream that was just started; its chunks are saved once it completes."""
+        return RecordingStream(stream, self, Track(model, track_key(model, messages), recorded_at=time.time()), clock)
+
+    def find(self, model, messages):
+        """The recording of this exact request, else the next one for the model, else the next of any."""
+        key = track_key(model, messages)
+        with self._lock:
+            for track in self.tracks:
+                if track.key == key:
+                    return track
+            self.misses += 1
+            candidates = [track for track in self.tracks if track.model == model] or self.tracks
+            if not candidates:
+                return None
+            index = self._next.get(model, 0)
+            self._next[model] = index + 1
+            return candidates[index % len(candidates)]
+
+    def replay(self, model, messages, speed=REPLAY_SPEED, on_idle=None, sleep=time.sleep, clock=time.perf_counter):
+        track = self.find(model, messages)
+        if track is None:
+            raise LookupError(f"Cassette {self.path} has no recordings to replay")
+        with self._lock:
+            self.replayed += 1
+        return ReplayStream(track, speed, on_idle, sleep, clock)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "tracks": len(self.tracks),
+                "recorded": self.recorded,
+                "replayed": self.replayed,
+                "misses": self.misses,
+            }
+
+
+class RecordingStream:
+    """Pass a stream's chunks through unchanged while timing them into a `Track`."""
+
+    def __init__(self, stream, cassette, track, clock=time.perf_counter):
+        self.stream = stream
+        self.cassette = cassette
+        self.track = track
+        self.clock = clock
+        self._last = clock()
+
+    def __iter__(self):
+        for chunk in self.stream:
+            now = self.clock()
+            self.track.chunks.append([round((now - self._last) * 1e6), encode_chunk(chunk)])
+            self._last = now
+            if _as_dict(chunk).get("done"):
+                # Only complete replies are kept; a stopped one would skew replays
+                self.cassette.add(self.track)
+            yield chunk
+
+    def cancel(self):
+        if hasattr(self.stream, "cancel"):
+            self.stream.cancel()
+
+
+class ReplayStream:
+    """Replay a `Track`'s chunks, sleeping so each arrives `delay / speed` after the previous one.
+
+    Chunks are due at fixed offsets from the start rather than after each
+    sleep, so slow consumers don't stretch the replay. With `speed=0` they
+    come back-to-back. Same interface as `ChatStream`.
+    """
+
+    def __init__(self, track, speed=REPLAY_SPEED, on_idle=None, sleep=time.sleep, clock=time.perf_counter):
+        self.track = track
+        self.speed = speed
+        self.on_idle = on_idle
+        self.sleep = sleep
+        self.clock = clock
+        self.cancelled = False
+
+    def __iter__(self):
+        started = self.clock()
+        offset = 0
+        for delay, data in self.track.chunks:
+            offset += delay
+            if self.speed > 0:
+                due = started + offset / 1e6 / self.speed
+                while not self.cancelled:
+                    remaining = due - self.clock()
+                    if remaining <= 0:
+                        break
+                    self.sleep(min(remaining, IDLE_POLL_INTERVAL))
+                    if self.on_idle is not None:
+                        self.on_idle()
+            if self.cancelled:
+                return
+            yield decode_chunk(self.track.model, data)
+
+    def cancel(self):
+        self.cancelled = True
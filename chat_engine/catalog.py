@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+
+from .client import get_client
+
+# How long a fetched model list is served before it is refreshed in the background
+DEFAULT_TTL = float(os.getenv("MODEL_CATALOG_TTL", "30"))
+
+
+class ModelCatalog:
+    """Process-wide cache of `ollama.list()` with a TTL and background refresh.
+
+    The first call fetches synchronously. After that the cached list is
+    always served immediately; once it is older than `ttl` seconds a single
+    background thread re-fetches it, so Streamlit reruns never wait on (or
+    repeat) the HTTP call. `invalidate()` forces the next call to re-fetch.
+
+    `show()` memoizes `ollama.show()` per model, keyed on the digest from the
+    list response, so metadata is fetched again only after a re-pull, and
+    a model that isn't installed is asked about once per list refresh.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, list_models=None, show_model=None, clock=time.monotonic, client=None):
+        self.ttl = ttl
+        self.clock = clock
+        client = client or get_client()
+        self._list_models = list_models or client.list
+        self._show_model = show_model or client.show
+        self._lock = threading.Lock()
+        self._models = None
+        self._fetched_at = None
+        self._refreshing = False
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.errors = 0
+        self.last_error = None
+        self._details = {}
+        self.show_hits = 0
+        self.show_misses = 0
+
+    def models(self):
+        """Return the cached list of `ollama.list()` models, fetching on first use."""
+        with self._lock:
+            if self._models is not None:
+                self.hits += 1
+                if self.clock() - self._fetched_at >= self.ttl and not self._refreshing:
+                    self._refreshing = True
+                    threading.Thread(target=self._background_refresh, daemon=True).start()
+                return self._models
+            self.misses += 1
+        return self._fetch()
+
+    def _fetch(self):
+        response = self._list_models()
+        models = list(response.models) if response and hasattr(response, "models") else []
+        with self._lock:
+            self._models = models
+            self._fetched_at = self.clock()
+            self.refreshes += 1
+        return models
+
+    def _background_refresh(self):
+        try:
+            self._fetch()
+        except Exception as e:
+            # Keep serving the stale list; the error is surfaced via stats()
+            with self._lock:
+                self.errors += 1
+                self.last_error = str(e)
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def names(self):
+        return [m.model for m in self.models()]
+
+    def find(self, prefix):
+        """Name of the first installed model starting with `prefix`, or None."""
+        for name in self.names():
+            if name.startswith(prefix):
+                return name
+        return None
+
+    def entry(self, name):
+        """The `ollama.list()` entry for `name`, or None if it isn't installed."""
+        for model in self.models():
+            if model.model == name:
+                return model
+        return None
+
+    def show(self, name):
+        """Cached `ollama.show(name)`, re-fetched when the model's digest changes.
+
+        For a model that isn't in the list, the outcome (usually a "not
+        found" error) is cached until the list is next refreshed.
+        """
+        entry = self.entry(name)
+        with self._lock:
+            if entry is not None:
+                version = entry.digest or entry.modified_at
+            else:
+                version = ("missing", self.refreshes)
+            cached = self._details.get(name)
+            if version is not None and cached is not None and cached[0] == version:
+                self.show_hits += 1
+                if cached[2] is not None:
+                    raise cached[2].with_traceback(None)
+                return cached[1]
+            self.show_misses += 1
+        try:
+            info = self._show_model(name)
+        except Exception as e:
+            if entry is None:
+                with self._lock:
+                    self._details[name] = (version, None, e)
+            raise
+        if version is not None:
+            with self._lock:
+                self._details[name] = (version, info, None)
+        return info
+
+    def invalidate(self):
+        with self._lock:
+            self._models = None
+            self._fetched_at = None
+            self._details.clear()
+
+    def stats(self):
+        with self._lock:
+            age = None if self._fetched_at is None else self.clock() - self._fetched_at
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "errors": self.errors,
+                "last_error": self.last_error,
+                "age_seconds": age,
+                "show_hits": self.show_hits,
+                "show_misses": self.show_misses,
+            }
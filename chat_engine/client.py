@@ -0,0 +1,105 @@
+import os
+import threading
+import time
+
+import httpx
+import ollama
+
+# Connection pool and timeout settings for the Ollama HTTP clients (the host comes from OLLAMA_HOST)
+POOL_SIZE = int(os.getenv("OLLAMA_POOL_SIZE", "10"))
+POOL_KEEPALIVE = int(os.getenv("OLLAMA_POOL_KEEPALIVE", str(POOL_SIZE)))
+KEEPALIVE_EXPIRY = float(os.getenv("OLLAMA_KEEPALIVE_EXPIRY", "120"))
+CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5"))
+# Longest wait for the next bytes of a response; model loads can take a while
+READ_TIMEOUT = float(os.getenv("OLLAMA_READ_TIMEOUT", "300"))
+
+# Functions called with (endpoint path, seconds until Ollama responded) after every API call
+CALL_LISTENERS = []
+
+_client = None
+_lock = threading.Lock()
+
+
+def pool_limits():
+    return httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_KEEPALIVE,
+                        keepalive_expiry=KEEPALIVE_EXPIRY)
+
+
+def request_timeout():
+    return httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT)
+
+
+class PoolMetrics:
+    """Request counts per endpoint and connection-pool utilization for one pooled client."""
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.requests = 0
+        self.calls = {}
+
+    def on_request(self, request):
+        self.requests += 1
+        request.extensions["chat_engine.started"] = time.perf_counter()
+
+    def on_response(self, response):
+        # Fires once the response headers arrive, so a stream counts until its first bytes
+        request = response.request
+        started = request.extensions.get("chat_engine.started")
+        if started is None:
+            return
+        endpoint = request.url.path
+        self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+        seconds = time.perf_counter() - started
+        for listener in CALL_LISTENERS:
+            listener(endpoint, seconds)
+
+    async def on_request_async(self, request):
+        self.on_request(request)
+
+    async def on_response_async(self, response):
+        self.on_response(response)
+
+    def stats(self):
+        # httpx doesn't expose its pool publicly; read httpcore's connection list if it is there
+        pool = getattr(self.transport, "_pool", None)
+        connections = list(getattr(pool, "connections", None) or [])
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {
+            "requests": self.requests,
+            "connections": len(connections),
+            "in_use": len(connections) - idle,
+            "idle": idle,
+            "max_connections": POOL_SIZE,
+            "calls": dict(self.calls),
+        }
+
+
+def make_client(host=None):
+    """A long-lived `ollama.Client` with a bounded keep-alive connection pool and timeouts."""
+    transport = httpx.HTTPTransport(limits=pool_limits())
+    metrics = PoolMetrics(transport)
+    client = ollama.Client(host=host, timeout=request_timeout(), transport=transport,
+                           event_hooks={"request": [metrics.on_request], "response": [metrics.on_response]})
+    client.metrics = metrics
+    return client
+
+
+def make_async_client(host=None):
+    """The `ollama.AsyncClient` counterpart of `make_client()`."""
+    transport = httpx.AsyncHTTPTransport(limits=pool_limits())
+    metrics = PoolMetrics(transport)
+    client = ollama.AsyncClient(host=host, timeout=request_timeout(), transport=transport,
+                                event_hooks={"request": [metrics.on_request_async],
+                                             "response": [metrics.on_response_async]})
+    client.metrics = metrics
+    return client
+
+
+def get_client():
+    """The process-wide pooled Ollama client used by the engine by default."""
+    global _client
+    with _lock:
+        if _client is None:
+            _client = make_client()
+        return _client
+
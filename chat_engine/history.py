@@ -0,0 +1,221 @@
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from .client import get_client
+from .think import split_think
+
+# Ollama's context size when the model's parameters don't set num_ctx
+DEFAULT_NUM_CTX = 2048
+# Share of the context window kept free for the model's reply
+REPLY_RESERVE_RATIO = 0.25
+# Rough per-message overhead of the chat template, in tokens
+MESSAGE_OVERHEAD_TOKENS = 4
+# Share of the prompt budget that retrieved document excerpts may use
+DOCUMENT_BUDGET_RATIO = 0.25
+
+DOCUMENTS_PROMPT = "Use these excerpts from the user's documents if they are relevant to the question."
+
+SUMMARY_PROMPT = (
+    "Summarize the conversation below in a few short sentences. Keep names, facts, "
+    "decisions and open questions; drop pleasantries. Reply with the summary only."
+)
+
+
+@dataclass(frozen=True)
+class ChatMessage:
+    """One stored chat message.
+
+    Assistant messages are split into answer (`content`) and reasoning
+    (`think`) once, when the reply finishes streaming, and never change
+    afterwards; `seq` is the position assigned by the conversation store.
+    """
+
+    role: str
+    content: str
+    think: str = ""
+    seq: Optional[int] = None
+
+
+def user_message(content):
+    return ChatMessage("user", content)
+
+
+def assistant_message(answer, think=""):
+    return ChatMessage("assistant", answer, think or "")
+
+
+def to_chat_message(message):
+    """Convert a stored history message to the Ollama chat format (without <think>)."""
+    return {"role": message.role, "content": message.content}
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token) that needs no tokenizer."""
+    return len(text) // 4 + 1
+
+
+def message_tokens(message):
+    return estimate_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+def context_window(model_info):
+    """The num_ctx Ollama will run the model with, from an `ollama.show()` response."""
+    parameters = (model_info or {}).get("parameters") or ""
+    match = re.search(r"^\s*num_ctx\s+(\d+)", parameters, re.MULTILINE)
+    return int(match.group(1)) if match else DEFAULT_NUM_CTX
+
+
+def prompt_budget(num_ctx):
+    """Tokens available for the prompt once room is kept for the reply."""
+    return max(num_ctx - int(num_ctx * REPLY_RESERVE_RATIO), 1)
+
+
+def select_window(messages, budget):
+    """Index of the oldest message that fits in `budget` tokens, walking back from the end.
+
+    The window never starts on an assistant message, so every kept reply
+    keeps the question it answers.
+    """
+    used = 0
+    start = len(messages)
+    for index in range(len(messages) - 1, -1, -1):
+        used += message_tokens(messages[index])
+        if used > budget:
+            break
+        start = index
+    while start < len(messages) and messages[start]["role"] == "assistant":
+        start += 1
+    return start
+
+
+def summarize_turns(model, previous_summary, messages, max_tokens, client=None, keep_alive=None):
+    """Fold evicted turns into the running conversation summary with one non-streamed call."""
+    client = client or get_client()
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+    if previous_summary:
+        transcript = f"Earlier summary: {previous_summary}\n{transcript}"
+    response = client.chat(
+        model=model,
+        messages=[{"role": "system", "content": SUMMARY_PROMPT}, {"role": "user", "content": transcript}],
+        options={"num_predict": max_tokens},
+        keep_alive=keep_alive,
+    )
+    summary, _ = split_think(response["message"]["content"])
+    return summary
+
+
+class ConversationMemory:
+    """Token-budgeted sliding window over a session's chat history.
+
+    Recent turns are sent verbatim for as long as they fit in the prompt
+    budget derived from the model's num_ctx. Turns that fall out of the
+    window are summarized once (incrementally, on top of the previous
+    summary) and sent as a system message, so the prompt size stays bounded
+    however long the conversation gets. Eviction frees half the window at a
+    time, so the extra summarization call happens every few turns.
+
+    Past turns are converted to chat messages once and then kept frozen, so
+    between evictions every request starts with a byte-identical prefix
+    (system prompt, summary, earlier turns) and Ollama can reuse its KV cache.
+    """
+
+    def __init__(self, system_prompt=""):
+        self.system_prompt = system_prompt
+        self.summary = ""
+        self.summarized = 0
+        self.num_ctx = DEFAULT_NUM_CTX
+        self.prompt_tokens = 0
+        self.window_messages = 0
+        self.documents_used = 0
+        self._window = []
+
+    def _prefix_messages(self):
+        messages = []
+        if self.system_prompt:
+            messages.append({"role": "system", "content": self.system_prompt})
+        if self.summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation: {self.summary}"})
+        return messages
+
+    def add(self, message):
+        """Record a stored history message (user or assistant) as it is appended."""
+        self._window.append(to_chat_message(message))
+
+    def discard_last(self):
+        """Forget the most recently added message (its turn failed)."""
+        if self._window:
+            self._window.pop()
+
+    def restore(self, summary, summarized, messages, load_earlier=None):
+        """Rebuild the memory from a saved summary and the latest page of stored messages.
+
+        `summarized` is how many messages from the start of the conversation
+        the summary covers; messages before it are not added again. Messages
+        the summary doesn't cover that precede the page are fetched with
+        `load_earlier(before_seq, limit)`, e.g. `ConversationStore.page`, so
+        they reach the model or the next summary. Without it the memory can
+        only start at the page.
+        """
+        self.summary = summary
+        self.summarized = summarized
+        self._window = []
+        first = messages[0].seq if messages else None
+        if first is not None and first > summarized:
+            if load_earlier is not None:
+                messages = load_earlier(first, first - summarized) + list(messages)
+            else:
+                self.summarized = first
+        for message in messages:
+            if message.seq is None or message.seq >= self.summarized:
+                self.add(message)
+
+    def build(self, prompt, num_ctx=DEFAULT_NUM_CTX, summarize=None, documents=()):
+        """Messages to send for `prompt`, given the history recorded with `add()`.
+
+        `summarize(previous_summary, evicted_chat_messages, max_tokens)` is
+        called when turns leave the window; without it they are just dropped.
+        `documents` are retrieved excerpts, best first; as many as fit in
+        their share of the budget are added to the new message only, so the
+        cached prefix of earlier turns is left as it was.
+        """
+        self.num_ctx = num_ctx
+        budget = prompt_budget(num_ctx)
+        summary_budget = budget // 8
+        new_message = {"role": "user", "content": prompt}
+
+        excerpts = []
+        room = int(budget * DOCUMENT_BUDGET_RATIO)
+        for text in documents:
+            cost = estimate_tokens(text) + 2
+            if cost > room:
+                break
+            excerpts.append(text)
+            room -= cost
+        self.documents_used = len(excerpts)
+        if excerpts:
+            content = "\n\n---\n\n".join(excerpts)
+            new_message = {"role": "user", "content": f"{DOCUMENTS_PROMPT}\n\n{content}\n\n---\n\nQuestion: {prompt}"}
+
+        available = budget - message_tokens(new_message) - summary_budget
+        if self.system_prompt:
+            available -= estimate_tokens(self.system_prompt) + MESSAGE_OVERHEAD_TOKENS
+        start = select_window(self._window, available)
+        if start:
+            # Evict down to half the budget so summarization runs every few turns, not every turn
+            start = select_window(self._window, available // 2)
+            evicted = self._window[:start]
+            if summarize is not None:
+                summary = summarize(self.summary, evicted, summary_budget)
+                # Hard cap in case the model ignored num_predict
+                self.summary = summary[: summary_budget * 4]
+            self.summarized += start
+            del self._window[:start]
+
+        messages = self._prefix_messages() + self._window + [new_message]
+        self.prompt_tokens = sum(message_tokens(m) for m in messages)
+        self.window_messages = len(self._window)
+        return messages
+
+    def reset(self):
+        self.__init__(self.system_prompt)
@@ -0,0 +1,127 @@
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import httpx
+
+# Texts sent per `ollama.embed` request
+EMBED_BATCH_SIZE = int(os.getenv("CHAT_EMBED_BATCH", "32"))
+# Embedding requests kept in flight at once
+EMBED_WORKERS = int(os.getenv("CHAT_EMBED_WORKERS", "2"))
+# Attempts per batch while Ollama reports it is overloaded
+MAX_RETRIES = 5
+# HTTP statuses Ollama (or a proxy in front of it) uses for "busy, try later"
+OVERLOAD_STATUSES = (429, 503)
+
+
+def is_overload(error):
+    """True for errors that mean the server is saturated rather than the request being bad."""
+    return getattr(error, "status_code", None) in OVERLOAD_STATUSES or isinstance(error, httpx.TimeoutException)
+
+
+def batched(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class EmbeddingPipeline:
+    """Embed a stream of texts as multi-input requests on a bounded worker pool.
+
+    `embed(texts)` is called with up to `batch_size` texts at a time, from at
+    most `workers` threads. The producer stops reading input while that many
+    batches are in flight, so memory stays bounded however large the input.
+    When Ollama signals overload (HTTP 429/503 or a timeout) the batch is
+    retried with exponential backoff and the number of requests in flight is
+    halved; it grows back by one after each run of successes.
+    """
+
+    def __init__(self, embed, batch_size=EMBED_BATCH_SIZE, workers=EMBED_WORKERS, max_retries=MAX_RETRIES,
+                 backoff=0.5, clock=time.perf_counter, sleep=time.sleep):
+        self.embed = embed
+        self.batch_size = max(batch_size, 1)
+        self.workers = max(workers, 1)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self.limit = self.workers
+        self._successes = 0
+        self.retries = 0
+        self.throttled = 0
+
+    def _embed_batch(self, texts):
+        for attempt in range(self.max_retries):
+            try:
+                vectors = self.embed(texts)
+            except Exception as e:
+                if not is_overload(e) or attempt == self.max_retries - 1:
+                    raise
+                with self._lock:
+                    self.retries += 1
+                    self.throttled += 1
+                    self.limit = max(1, self.limit // 2)
+                    self._successes = 0
+                self.sleep(self.backoff * 2 ** attempt)
+                continue
+            with self._lock:
+                self._successes += 1
+                if self._successes >= self.workers and self.limit < self.workers:
+                    self.limit += 1
+                    self._successes = 0
+            return vectors
+
+    def run(self, items, on_batch, on_progress=None):
+        """Embed `(key, text)` items; `on_batch(keys, texts, vectors)` runs in the calling thread.
+
+        Batches are handed to `on_batch` as they complete, so a caller that
+        saves them right away can resume an interrupted run from what was
+        saved. Returns throughput statistics.
+        """
+        started = self.clock()
+        done_chunks = 0
+        batches = 0
+        pending = {}
+        executor = ThreadPoolExecutor(self.workers, thread_name_prefix="embed")
+
+        def collect(futures):
+            nonlocal done_chunks, batches
+            for future in futures:
+                keys, texts = pending.pop(future)
+                on_batch(keys, texts, future.result())
+                done_chunks += len(keys)
+                batches += 1
+                if on_progress is not None:
+                    on_progress(done_chunks)
+
+        try:
+            for batch in batched(items, self.batch_size):
+                # Backpressure: wait for a slot before reading more input
+                while len(pending) >= self.limit:
+                    collect(wait(pending, return_when=FIRST_COMPLETED).done)
+                keys = [key for key, _ in batch]
+                texts = [text for _, text in batch]
+                pending[executor.submit(self._embed_batch, texts)] = (keys, texts)
+            while pending:
+                collect(wait(pending, return_when=FIRST_COMPLETED).done)
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+        seconds = self.clock() - started
+        return {
+            "chunks": done_chunks,
+            "batches": batches,
+            "seconds": seconds,
+            "chunks_per_sec": done_chunks / seconds if seconds > 0 and done_chunks else None,
+            "retries": self.retries,
+            "throttled": self.throttled,
+        }
@@ -0,0 +1,324 @@
+import bisect
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .client import CALL_LISTENERS
+
+# Port of the Prometheus text-format endpoint at /metrics; 0 leaves it (and recording) off
+METRICS_PORT = int(os.getenv("CHAT_METRICS_PORT", "0"))
+METRICS_HOST = os.getenv("CHAT_METRICS_HOST", "127.0.0.1")
+METRICS_ENABLED = METRICS_PORT > 0
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+TOKEN_RATE_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 200, 300, 500, 1000)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Shards:
+    """Per-thread partial values that are only added up when scraped.
+
+    Recording only touches a dict owned by the calling thread, so the
+    streaming path never waits for a lock; one is taken the first time a
+    thread records and on each scrape. Streamlit runs every rerun in a new
+    thread, so whenever a thread registers or a scrape runs, the shards of
+    finished threads are folded into a base total. The list stays bounded
+    by the live threads even if nothing ever scrapes.
+    """
+
+    def __init__(self, merge):
+        self.merge = merge
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []
+        self._retired = {}
+
+    def shard(self):
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            with self._lock:
+                self._fold_finished()
+                self._shards.append((threading.current_thread(), values))
+            return values
+
+    def _fold_finished(self):
+        alive = []
+        for thread, values in self._shards:
+            if thread.is_alive():
+                alive.append((thread, values))
+            else:
+                # A finished thread can't write any more, so its values are final
+                for key, value in values.items():
+                    self._retired[key] = self.merge(self._retired.get(key), value)
+        self._shards = alive
+
+    def collect(self):
+        with self._lock:
+            self._fold_finished()
+            totals = dict(self._retired)
+            for _, values in self._shards:
+                for key, value in list(values.items()):
+                    totals[key] = self.merge(totals.get(key), value)
+            return totals
+
+
+def _add(total, value):
+    return value if total is None else total + value
+
+
+def _add_buckets(total, value):
+    if total is None:
+        return list(value)
+    return [a + b for a, b in zip(total, value)]
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = _Shards(_add)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        values = self._values.shard()
+        values[key] = values.get(key, 0) + amount
+
+    def samples(self):
+        return [(self.name, self.labels, key, value) for key, value in sorted(self._values.collect().items())]
+
+
+class Gauge(Counter):
+    """A value that goes up and down, kept as the sum of every thread's increments."""
+
+    kind = "gauge"
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = _Shards(_add_buckets)
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        values = self._values.shard()
+        counts = values.get(key)
+        if counts is None:
+            # One slot per bucket plus +Inf, then the sum of observed values
+            counts = values[key] = [0] * (len(self.buckets) + 2)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def samples(self):
+        samples = []
+        for key, counts in sorted(self._values.collect().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", self.labels, key, cumulative, ("le", format_value(bound))))
+            samples.append((f"{self.name}_sum", self.labels, key, counts[-1]))
+            samples.append((f"{self.name}_count", self.labels, key, cumulative))
+        return samples
+
+
+class Registry:
+    """Metrics recorded as they happen, plus collectors that read other objects' stats at scrape time."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = {}
+        self._lock = threading.Lock()
+
+    def add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self.add(Counter(name, help, labels))
+
+    def gauge(self, name, help, labels=()):
+        return self.add(Gauge(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self.add(Histogram(name, help, labels, buckets))
+
+    def register_collector(self, key, collect):
+        """`collect()` returns (name, kind, help, [(labels dict, value), ...]) tuples; `key` replaces an earlier one."""
+        with self._lock:
+            self._collectors[key] = collect
+
+    def expose(self):
+        """Everything in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            samples = metric.samples()
+            if not samples:
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, label_names, key, value, *extra in samples:
+                lines.append(f"{name}{format_labels(label_names, key, extra)} {format_value(value)}")
+        with self._lock:
+            collectors = list(self._collectors.values())
+        for collect in collectors:
+            try:
+                families = list(collect())
+            except Exception as e:
+                lines.append(f"# collector failed: {_escape(e)}")
+                continue
+            for name, kind, help, samples in families:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    if value is not None:
+                        lines.append(f"{name}{format_labels(labels.keys(), labels.values())} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REPLIES = REGISTRY.counter("chat_replies_total", "Replies shown, by where they came from", ("model", "source"))
+ACTIVE_STREAMS = REGISTRY.gauge("chat_active_streams", "Replies currently streaming from Ollama", ("model",))
+TTFT = REGISTRY.histogram("chat_ttft_seconds", "Time from sending a prompt to its first streamed token", ("model",))
+DELIVERED_RATE = REGISTRY.histogram("chat_delivered_tokens_per_second", "Tokens per second delivered to the browser",
+                                    ("model",), TOKEN_RATE_BUCKETS)
+GENERATED_RATE = REGISTRY.histogram("ollama_generated_tokens_per_second", "Tokens per second generated by Ollama",
+                                    ("model",), TOKEN_RATE_BUCKETS)
+EVAL_DURATION = REGISTRY.histogram("ollama_eval_duration_seconds", "Ollama's eval_duration per reply", ("model",))
+PROMPT_EVAL_DURATION = REGISTRY.histogram("ollama_prompt_eval_duration_seconds",
+                                          "Ollama's prompt_eval_duration per reply", ("model",))
+LOAD_DURATION = REGISTRY.histogram("ollama_load_duration_seconds", "Ollama's load_duration per reply", ("model",))
+EVAL_TOKENS = REGISTRY.counter("ollama_eval_tokens_total", "Tokens generated (eval_count)", ("model",))
+PROMPT_EVAL_TOKENS = REGISTRY.counter("ollama_prompt_eval_tokens_total", "Prompt tokens evaluated (prompt_eval_count)",
+                                      ("model",))
+API_CALLS = REGISTRY.histogram("ollama_api_call_seconds", "Ollama API calls, by endpoint, until the response started",
+                               ("endpoint",))
+
+
+def record_call(endpoint, seconds):
+    API_CALLS.observe(seconds, endpoint=endpoint)
+
+
+def record_reply(model, stats, source="ollama"):
+    """Record one finished reply from its `Reply.stats`; only Ollama replies have generation timings."""
+    REPLIES.inc(model=model, source=source)
+    if source != "ollama":
+        return
+    if stats.get("ttft") is not None:
+        TTFT.observe(stats["ttft"], model=model)
+    if stats.get("delivered_tps"):
+        DELIVERED_RATE.observe(stats["delivered_tps"], model=model)
+    if stats.get("generated_tps"):
+        GENERATED_RATE.observe(stats["generated_tps"], model=model)
+    for field, histogram in (("eval_duration", EVAL_DURATION), ("prompt_eval_duration", PROMPT_EVAL_DURATION),
+                             ("load_duration", LOAD_DURATION)):
+        if stats.get(field) is not None:
+            histogram.observe(stats[field] / 1e9, model=model)
+    if stats.get("eval_count"):
+        EVAL_TOKENS.inc(stats["eval_count"], model=model)
+    if stats.get("prompt_eval_count"):
+        PROMPT_EVAL_TOKENS.inc(stats["prompt_eval_count"], model=model)
+
+
+def scheduler_families(scheduler):
+    """Queue depth and admission counters from a `RequestScheduler`, for `Registry.register_collector`."""
+    stats = scheduler.stats()
+    models = stats["models"]
+    return [
+        ("chat_queue_depth", "gauge", "Prompts waiting for a generation slot",
+         [({"model": model}, counts["queued"]) for model, counts in models.items()]),
+        ("chat_generations_active", "gauge", "Generations holding a slot",
+         [({"model": model}, counts["active"]) for model, counts in models.items()]),
+        ("chat_queue_granted_total", "counter", "Prompts given a generation slot", [({}, stats["granted"])]),
+        ("chat_queue_rejected_total", "counter", "Prompts turned away by a full queue", [({}, stats["rejected"])]),
+        ("chat_queue_abandoned_total", "counter", "Prompts that left the queue before their turn",
+         [({}, stats["abandoned"])]),
+    ]
+
+
+def cache_families(caches):
+    """Hit and miss counters plus hit ratios; `caches` maps a cache name to a function returning (hits, misses)."""
+    hits, misses, ratios = [], [], []
+    for name, read in caches.items():
+        cache_hits, cache_misses = read()
+        lookups = cache_hits + cache_misses
+        hits.append(({"cache": name}, cache_hits))
+        misses.append(({"cache": name}, cache_misses))
+        ratios.append(({"cache": name}, cache_hits / lookups if lookups else None))
+    return [
+        ("chat_cache_hits_total", "counter", "Cache lookups answered from the cache", hits),
+        ("chat_cache_misses_total", "counter", "Cache lookups that missed", misses),
+        ("chat_cache_hit_ratio", "gauge", "Hits over all lookups since start", ratios),
+    ]
+
+
+def pool_families(clients):
+    """Connection-pool use of pooled Ollama clients; `clients` maps a name to a client from `make_client()`."""
+    connections = []
+    for name, client in clients.items():
+        stats = client.metrics.stats()
+        connections.append(({"client": name, "state": "in_use"}, stats["in_use"]))
+        connections.append(({"client": name, "state": "idle"}, stats["idle"]))
+    return [("ollama_pool_connections", "gauge", "Open connections to Ollama", connections)]
+
+
+class MetricsServer:
+    """Serves a registry at /metrics from a daemon thread of the current process."""
+
+    def __init__(self, host=METRICS_HOST, port=METRICS_PORT, registry=REGISTRY):
+        self.registry = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.expose().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.address = self.server.server_address
+        threading.Thread(target=self.server.serve_forever, name="metrics-server", daemon=True).start()
+        if record_call not in CALL_LISTENERS:
+            CALL_LISTENERS.append(record_call)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
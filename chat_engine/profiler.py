@@ -0,0 +1,231 @@
+import cProfile
+import heapq
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import warnings
+from collections import deque
+from contextlib import contextmanager
+
+from .client import CALL_LISTENERS
+
+# Off by default; ?profile=1 in the URL turns it on for one browser session instead
+PROFILE_ENABLED = os.getenv("CHAT_PROFILE", "0").lower() in ("1", "true", "yes")
+PROFILE_QUERY_PARAM = "profile"
+# JSON file the aggregated timings are written to, at most every CHAT_PROFILE_DUMP_INTERVAL seconds
+PROFILE_DUMP_PATH = os.getenv("CHAT_PROFILE_DUMP")
+PROFILE_DUMP_INTERVAL = float(os.getenv("CHAT_PROFILE_DUMP_INTERVAL", "5"))
+# "cprofile" or "pyinstrument" (if installed): profile every rerun and keep the call trees of the slowest
+PROFILE_CAPTURE = os.getenv("CHAT_PROFILE_CAPTURE", "").lower()
+PROFILE_KEEP = int(os.getenv("CHAT_PROFILE_KEEP", "5"))
+# Durations kept per section for percentiles
+PROFILE_SAMPLES = 1000
+# Functions listed per captured cProfile report
+CPROFILE_LINES = 30
+
+
+def summarize(values, count=None):
+    """Count, mean and percentiles (in milliseconds) of a list of durations in seconds."""
+    ordered = sorted(values)
+
+    def at(q):
+        return ordered[min(int(len(ordered) * q / 100), len(ordered) - 1)] * 1000
+
+    return {
+        "count": len(ordered) if count is None else count,
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "p50_ms": at(50),
+        "p95_ms": at(95),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+class Rerun:
+    """Timings collected during one script run."""
+
+    def __init__(self, session):
+        self.session = session
+        self.sections = {}
+        self.calls = []
+
+
+class SectionProfiler:
+    """Time named sections of each Streamlit rerun and the Ollama calls made during it.
+
+    `rerun()` wraps one script run and `section(name)` a part of it; sections
+    may nest, so their times can add up to more than the rerun. Ollama API
+    calls made from the script thread are attributed to the rerun through
+    the client's `CALL_LISTENERS`. Durations are aggregated over all
+    sessions into bounded samples for percentiles. Outside `rerun()`,
+    `section()` does nothing, so instrumented code costs next to nothing
+    when profiling is off. The `keep` slowest reruns are kept with their
+    breakdown and, if `capture` is set, a cProfile or pyinstrument report.
+    A capture that can't be used is turned off with a warning, kept in
+    `capture_error`, instead of failing every rerun.
+    """
+
+    def __init__(self, samples=PROFILE_SAMPLES, capture=PROFILE_CAPTURE, keep=PROFILE_KEEP,
+                 dump_path=PROFILE_DUMP_PATH, dump_interval=PROFILE_DUMP_INTERVAL, clock=time.perf_counter):
+        self.samples = samples
+        self.capture, self.capture_error = self._check_capture(capture.lower())
+        self.keep = keep
+        self.dump_path = dump_path
+        self.dump_interval = dump_interval
+        self.clock = clock
+        self.reruns = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._sessions = set()
+        self._durations = {}
+        self._counts = {}
+        self._slowest = []
+        self._sequence = 0
+        self._last_dump = None
+        CALL_LISTENERS.append(self.record_call)
+
+    def close(self):
+        if self.record_call in CALL_LISTENERS:
+            CALL_LISTENERS.remove(self.record_call)
+
+    @contextmanager
+    def rerun(self, session):
+        rerun = Rerun(session)
+        self._local.rerun = rerun
+        capture = self._start_capture()
+        started = self.clock()
+        try:
+            yield rerun
+        finally:
+            seconds = self.clock() - started
+            self._local.rerun = None
+            if capture is not None and self.capture == "cprofile":
+                capture.disable()
+            elif capture is not None:
+                capture.stop()
+            self._finish(rerun, seconds, capture)
+
+    @contextmanager
+    def section(self, name):
+        rerun = getattr(self._local, "rerun", None)
+        if rerun is None:
+            yield
+            return
+        started = self.clock()
+        try:
+            yield
+        finally:
+            rerun.sections[name] = rerun.sections.get(name, 0.0) + self.clock() - started
+
+    def record_call(self, endpoint, seconds):
+        rerun = getattr(self._local, "rerun", None)
+        if rerun is not None:
+            rerun.calls.append((endpoint, seconds))
+
+    @staticmethod
+    def _check_capture(capture):
+        error = None
+        if capture not in ("", "cprofile", "pyinstrument"):
+            error = f"Unsupported profile capture {capture!r}; use cprofile or pyinstrument"
+        elif capture == "pyinstrument":
+            try:
+                import pyinstrument  # noqa: F401
+            except ImportError:
+                error = "Profile capture pyinstrument is not installed (pip install pyinstrument)"
+        if error is None:
+            return capture, None
+        warnings.warn(f"{error}; reruns are timed without a capture", stacklevel=3)
+        return "", error
+
+    def _start_capture(self):
+        if not self.capture:
+            return None
+        if self.capture == "cprofile":
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Python 3.12+ allows one cProfile at a time; skip reruns that overlap another session's
+                return None
+            return profile
+        from pyinstrument import Profiler
+
+        profile = Profiler(async_mode="disabled")
+        profile.start()
+        return profile
+
+    def _report(self, capture):
+        if self.capture == "pyinstrument":
+            return capture.output_text(unicode=True)
+        stream = io.StringIO()
+        pstats.Stats(capture, stream=stream).sort_stats("cumulative").print_stats(CPROFILE_LINES)
+        return stream.getvalue()
+
+    def _add(self, name, seconds):
+        samples = self._durations.get(name)
+        if samples is None:
+            samples = self._durations[name] = deque(maxlen=self.samples)
+        samples.append(seconds)
+        self._counts[name] = self._counts.get(name, 0) + 1
+
+    def _finish(self, rerun, seconds, capture):
+        with self._lock:
+            self.reruns += 1
+            self._sessions.add(rerun.session)
+            self._add("rerun", seconds)
+            for name, section_seconds in rerun.sections.items():
+                self._add(name, section_seconds)
+            for endpoint, call_seconds in rerun.calls:
+                self._add(f"ollama {endpoint}", call_seconds)
+            slow = len(self._slowest) < self.keep or (self._slowest and seconds > self._slowest[0][0])
+        if slow and self.keep > 0:
+            # Only reruns that make the cut pay for formatting their profile
+            entry = {
+                "ms": seconds * 1000,
+                "session": rerun.session,
+                "sections": {name: value * 1000 for name, value in rerun.sections.items()},
+                "calls": [[endpoint, value * 1000] for endpoint, value in rerun.calls],
+                "profile": self._report(capture) if capture is not None else None,
+            }
+            with self._lock:
+                self._sequence += 1
+                item = (seconds, self._sequence, entry)
+                if len(self._slowest) < self.keep:
+                    heapq.heappush(self._slowest, item)
+                else:
+                    heapq.heappushpop(self._slowest, item)
+        if self.dump_path:
+            with self._lock:
+                now = self.clock()
+                due = self._last_dump is None or now - self._last_dump >= self.dump_interval
+                if due:
+                    self._last_dump = now
+            if due:
+                self.dump(self.dump_path)
+
+    def stats(self):
+        with self._lock:
+            durations = {name: list(samples) for name, samples in self._durations.items()}
+            counts = dict(self._counts)
+            slowest = [entry for _, _, entry in sorted(self._slowest, reverse=True)]
+            stats = {"reruns": self.reruns, "sessions": len(self._sessions)}
+        summaries = {name: summarize(values, counts[name]) for name, values in durations.items()}
+        rerun = summaries.pop("rerun", None)
+        stats["rerun"] = rerun
+        stats["sections"] = {name: summary for name, summary in summaries.items() if not name.startswith("ollama ")}
+        stats["calls"] = {name[len("ollama "):]: summary for name, summary in summaries.items()
+                          if name.startswith("ollama ")}
+        if rerun:
+            # Share of the average rerun each section takes, counting reruns it didn't run in as zero
+            for summary in stats["sections"].values():
+                summary["share"] = summary["mean_ms"] * summary["count"] / (rerun["mean_ms"] * rerun["count"])
+        stats["slowest"] = slowest
+        return stats
+
+    def dump(self, path):
+        temp = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(self.stats(), f, indent=2)
+        os.replace(temp, path)
@@ -0,0 +1,41 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class ModelProfile:
+    """Everything that differs between the DeepSeek-R1 and LLaMA3 apps."""
+
+    name: str
+    prefix: str
+    default_model: str
+    icon: str
+    about: str
+    empty_response: str = "🤖 No response generated."
+    # Prepended to every request; keep it constant so the prompt prefix stays cacheable
+    system_prompt: str = ""
+    # How long Ollama keeps the model (and its KV cache) loaded after a request
+    keep_alive: str = "30m"
+
+    @property
+    def page_title(self):
+        return f"{self.name} Chatbot"
+
+
+DEEPSEEK_R1 = ModelProfile(
+    name="DeepSeek-R1",
+    prefix="deepseek-r1",
+    default_model="deepseek-r1:1.5b",
+    icon="🤖",
+    about="**DeepSeek-R1 (1.5B)** - A powerful open-source language model",
+    empty_response="🤖 No direct response was generated.",
+)
+
+LLAMA3 = ModelProfile(
+    name="LLaMA3",
+    prefix="llama3",
+    default_model="llama3:latest",
+    icon="🦙",
+    about="**LLaMA3 (latest)** - A high-performance open-source language model",
+)
+
+PROFILES = {profile.prefix: profile for profile in (DEEPSEEK_R1, LLAMA3)}
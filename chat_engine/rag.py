@@ -0,0 +1,332 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from .client import get_client
+from .ingest import EMBED_BATCH_SIZE, EMBED_WORKERS, EmbeddingPipeline
+from .semantic_cache import EMBED_MODEL
+from .vector_store import VECTOR_DTYPE, VectorStore, normalize
+
+# Off by default: retrieved document excerpts are added to each prompt
+RAG_ENABLED = os.getenv("CHAT_RAG", "0").lower() in ("1", "true", "yes")
+RAG_INDEX_PATH = os.getenv("CHAT_RAG_INDEX", "rag_index.db")
+# Directory of the memory-mapped chunk embeddings
+RAG_VECTORS_PATH = os.getenv("CHAT_RAG_VECTORS", "rag_vectors")
+# Folder kept in sync with the index by a background thread; empty to only use uploads
+RAG_FOLDER = os.getenv("CHAT_RAG_FOLDER", "")
+RAG_WATCH_INTERVAL = float(os.getenv("CHAT_RAG_WATCH_INTERVAL", "10"))
+RAG_TOP_K = int(os.getenv("CHAT_RAG_TOP_K", "4"))
+CHUNK_CHARS = int(os.getenv("CHAT_RAG_CHUNK_CHARS", "1500"))
+CHUNK_OVERLAP = 200
+# Source name prefix for documents uploaded through the sidebar
+UPLOAD_PREFIX = "upload:"
+TEXT_SUFFIXES = (".txt", ".md", ".markdown", ".rst", ".py", ".csv", ".json", ".html")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    source TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    size INTEGER,
+    mtime REAL,
+    chunks INTEGER NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS passages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source TEXT NOT NULL,
+    ord INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    UNIQUE (source, ord)
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    source TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+@dataclass
+class Passage:
+    source: str
+    ord: int
+    text: str
+    score: float
+
+    @property
+    def label(self):
+        source = self.source[len(UPLOAD_PREFIX):] if self.source.startswith(UPLOAD_PREFIX) else self.source
+        return os.path.basename(source)
+
+
+def chunk_text(text, size=CHUNK_CHARS, overlap=CHUNK_OVERLAP):
+    """Split a document into chunks of up to `size` characters along paragraph breaks.
+
+    Paragraphs longer than `size` are cut into overlapping windows.
+    """
+    pieces = []
+    step = max(size - overlap, 1)
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if len(paragraph) <= size:
+            if paragraph:
+                pieces.append(paragraph)
+        else:
+            pieces.extend(paragraph[i:i + size] for i in range(0, len(paragraph) - overlap, step))
+
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) + 2 > size:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class DocumentIndex:
+    """Persistent, incrementally updated index of document chunks for retrieval.
+
+    Each document is split into chunks, embedded through an
+    `EmbeddingPipeline` and stored in SQLite together with its content hash.
+    Re-indexing skips documents whose hash (or, for files, size and mtime)
+    is unchanged, so only edited files are embedded again. Chunks are saved
+    batch by batch under a checkpoint, so an interrupted ingest resumes
+    where it stopped. Chunk vectors live in a memory-mapped `VectorStore`,
+    keyed by the passage id, so opening a large index is instant.
+    """
+
+    def __init__(self, path=RAG_INDEX_PATH, embed_model=EMBED_MODEL, client=None, batch_size=EMBED_BATCH_SIZE,
+                 workers=EMBED_WORKERS, vectors_path=RAG_VECTORS_PATH, dtype=VECTOR_DTYPE):
+        self.path = path
+        self.embed_model = embed_model
+        self.batch_size = batch_size
+        self.workers = workers
+        self._client = client
+        self._lock = threading.Lock()
+        # One ingest at a time, so uploads and the folder watcher never write the same document
+        self._ingest_lock = threading.Lock()
+        self.last_ingest = None
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self.vectors = VectorStore(vectors_path, dtype)
+        self._watcher = None
+        self.last_sync_error = None
+        self._check_consistency()
+
+    def _reset(self):
+        self._conn.execute("DELETE FROM passages")
+        self._conn.execute("DELETE FROM documents")
+        self._conn.execute("DELETE FROM checkpoints")
+        self.vectors.clear()
+
+    def _check_consistency(self):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'embed_model'").fetchone()
+            if row and row[0] != self.embed_model:
+                # Vectors from another embedding model can't be compared with new ones
+                self._reset()
+            else:
+                self._drop_unmatched()
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('embed_model', ?)",
+                               (self.embed_model,))
+
+    def _drop_unmatched(self):
+        rows = self._conn.execute("SELECT id, source FROM passages").fetchall()
+        passage_ids = np.fromiter((id_ for id_, _ in rows), dtype=np.int64, count=len(rows))
+        vector_ids = self.vectors.ids()
+        orphans = np.setdiff1d(vector_ids, passage_ids)
+        if len(orphans):
+            # Left by a batch whose rows were rolled back after its vectors were written
+            self.vectors.delete(orphans.tolist())
+        missing = set(np.setdiff1d(passage_ids, vector_ids).tolist())
+        # Passages whose vectors were lost can't be searched: drop their documents so they are indexed again
+        for source in {source for id_, source in rows if id_ in missing}:
+            self._forget(source)
+
+    def embed(self, texts):
+        """Normalized float32 embeddings of `texts`, in one request."""
+        client = self._client or get_client()
+        return normalize(client.embed(model=self.embed_model, input=texts)["embeddings"])
+
+    def index_text(self, source, text, size=None, mtime=None, on_progress=None):
+        """Index one document; returns the number of chunks embedded (0 if it was unchanged)."""
+        return self.index_documents([(source, text, size, mtime)], on_progress)
+
+    def index_documents(self, documents, on_progress=None):
+        """Index `(source, text, size, mtime)` documents through one embedding pipeline.
+
+        Returns the number of chunks embedded. `on_progress(done, total)` is
+        called after every saved batch.
+        """
+        with self._ingest_lock:
+            items = []
+            pending = {}
+            for source, text, size, mtime in documents:
+                digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+                with self._lock:
+                    row = self._conn.execute("SELECT sha256 FROM documents WHERE source = ?", (source,)).fetchone()
+                    if row and row[0] == digest:
+                        self._conn.execute("UPDATE documents SET size = ?, mtime = ? WHERE source = ?",
+                                           (size, mtime, source))
+                        continue
+                    checkpoint = self._conn.execute("SELECT sha256 FROM checkpoints WHERE source = ?",
+                                                    (source,)).fetchone()
+                    if checkpoint and checkpoint[0] == digest:
+                        # Same content as an ingest that was interrupted: keep the chunks it saved
+                        saved = {ord_ for (ord_,) in self._conn.execute(
+                            "SELECT ord FROM passages WHERE source = ?", (source,))}
+                    else:
+                        saved = set()
+                        self._delete_passages(source)
+                        self._conn.execute("INSERT OR REPLACE INTO checkpoints (source, sha256) VALUES (?, ?)",
+                                           (source, digest))
+                chunks = chunk_text(text)
+                todo = [((source, i), chunk) for i, chunk in enumerate(chunks) if i not in saved]
+                pending[source] = [len(todo), digest, size, mtime, len(chunks)]
+                items.extend(todo)
+
+            for source, state in pending.items():
+                if not state[0]:
+                    self._finish_document(source, *state[1:])
+
+            total = len(items)
+            if not total:
+                # Nothing to embed: keep the last real ingest's throughput on display
+                return 0
+
+            def on_batch(keys, texts, vectors):
+                with self._lock:
+                    self._conn.execute("BEGIN IMMEDIATE")
+                    try:
+                        ids = [
+                            self._conn.execute("INSERT INTO passages (source, ord, text) VALUES (?, ?, ?)",
+                                               (source, ord_, text)).lastrowid
+                            for (source, ord_), text in zip(keys, texts)
+                        ]
+                        # Ids are never reused, so vectors whose rows failed to commit are never matched,
+                        # and the next open deletes them
+                        self.vectors.append(ids, vectors)
+                        self._conn.execute("COMMIT")
+                    except BaseException:
+                        self._conn.execute("ROLLBACK")
+                        raise
+                for source, _ in keys:
+                    pending[source][0] -= 1
+                    if not pending[source][0]:
+                        self._finish_document(source, *pending[source][1:])
+
+            pipeline = EmbeddingPipeline(self.embed, self.batch_size, self.workers)
+            self.last_ingest = pipeline.run(items, on_batch, on_progress and (lambda done: on_progress(done, total)))
+            return self.last_ingest["chunks"]
+
+    def _finish_document(self, source, digest, size, mtime, chunks):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents (source, sha256, size, mtime, chunks, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (source, digest, size, mtime, chunks, time.time()),
+            )
+            self._conn.execute("DELETE FROM checkpoints WHERE source = ?", (source,))
+
+    def _is_unchanged(self, path, stat):
+        with self._lock:
+            row = self._conn.execute("SELECT size, mtime FROM documents WHERE source = ?", (str(path),)).fetchone()
+        return bool(row) and row[0] == stat.st_size and row[1] == stat.st_mtime
+
+    def index_file(self, path):
+        """Index a text file unless its size and mtime match the indexed version."""
+        return self.index_files([path])
+
+    def index_files(self, paths, on_progress=None):
+        """Index the new or changed files among `paths` in one pipeline run."""
+        documents = []
+        for path in map(Path, paths):
+            stat = path.stat()
+            if not self._is_unchanged(path, stat):
+                text = path.read_text(encoding="utf-8", errors="replace")
+                documents.append((str(path), text, stat.st_size, stat.st_mtime))
+        return self.index_documents(documents, on_progress) if documents else 0
+
+    def _delete_passages(self, source):
+        ids = [id_ for (id_,) in self._conn.execute("SELECT id FROM passages WHERE source = ?", (source,))]
+        if ids:
+            self.vectors.delete(ids)
+            self._conn.execute("DELETE FROM passages WHERE source = ?", (source,))
+
+    def _forget(self, source):
+        self._delete_passages(source)
+        self._conn.execute("DELETE FROM documents WHERE source = ?", (source,))
+        self._conn.execute("DELETE FROM checkpoints WHERE source = ?", (source,))
+
+    def remove(self, source):
+        with self._lock:
+            self._forget(source)
+
+    def sync_folder(self, folder):
+        """Index new and changed files under `folder` and drop deleted ones."""
+        folder = Path(folder)
+        paths = sorted(p for p in folder.rglob("*") if p.is_file() and p.suffix.lower() in TEXT_SUFFIXES)
+        changed = [path for path in paths if not self._is_unchanged(path, path.stat())]
+        self.index_files(changed)
+        indexed = len(changed)
+        present = {str(path) for path in paths}
+        prefix = str(folder) + os.sep
+        with self._lock:
+            sources = [row[0] for row in self._conn.execute("SELECT source FROM documents")]
+        removed = [s for s in sources if s.startswith(prefix) and s not in present]
+        for source in removed:
+            self.remove(source)
+        return {"indexed": indexed, "removed": len(removed)}
+
+    def watch(self, folder, interval=RAG_WATCH_INTERVAL):
+        """Keep `folder` in sync from a background thread (started once)."""
+        if self._watcher is not None:
+            return
+
+        def run():
+            while True:
+                try:
+                    self.sync_folder(folder)
+                    self.last_sync_error = None
+                except Exception as e:
+                    self.last_sync_error = str(e)
+                time.sleep(interval)
+
+        self._watcher = threading.Thread(target=run, name="rag-folder-watch", daemon=True)
+        self._watcher.start()
+
+    def search(self, query, k=RAG_TOP_K):
+        """The `k` chunks most similar to `query`, best first."""
+        if k <= 0 or not len(self.vectors):
+            return []
+        passages = []
+        for id_, score in self.vectors.search(self.embed([query])[0], k):
+            with self._lock:
+                row = self._conn.execute("SELECT source, ord, text FROM passages WHERE id = ?", (id_,)).fetchone()
+            if row:
+                passages.append(Passage(row[0], row[1], row[2], score))
+        return passages
+
+    def stats(self):
+        with self._lock:
+            documents, chunks = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(chunks), 0) FROM documents"
+            ).fetchone()
+        return {"documents": documents, "chunks": chunks, "last_sync_error": self.last_sync_error,
+                "last_ingest": self.last_ingest, "vectors": self.vectors.stats()}
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+# Off by default: a cached reply is returned instead of a fresh sample from the model
+RESPONSE_CACHE_ENABLED = os.getenv("CHAT_RESPONSE_CACHE", "0").lower() in ("1", "true", "yes")
+RESPONSE_CACHE_PATH = os.getenv("CHAT_RESPONSE_CACHE_PATH", "response_cache.db")
+# In-memory tier size in bytes of cached reply text
+RESPONSE_CACHE_BYTES = int(float(os.getenv("CHAT_RESPONSE_CACHE_MB", "16")) * 1024 * 1024)
+# Replies kept in the disk tier; the least recently used are dropped first
+RESPONSE_CACHE_DISK_ENTRIES = int(os.getenv("CHAT_RESPONSE_CACHE_DISK_ENTRIES", "10000"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    used_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS responses_used_at ON responses (used_at);
+"""
+
+_WHITESPACE = re.compile(r"\s+")
+# Replayed replies are cut into word-sized chunks, roughly what Ollama streams
+_REPLAY_CHUNK = re.compile(r"\s*\S+|\s+")
+
+
+def normalize_text(text):
+    """Unicode-normalize and collapse whitespace, so trivially different prompts share an entry."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def cache_key(model, digest, messages, options=None):
+    """Key for one request: model and its digest, generation options, normalized messages.
+
+    Returns None when the digest is unknown, since a re-pulled model must not
+    be served replies from the old one.
+    """
+    if not digest:
+        return None
+    payload = {
+        "model": model,
+        "digest": digest,
+        "options": options or {},
+        "messages": [[m["role"], normalize_text(m["content"])] for m in messages],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def replay_stream(raw):
+    """Chunks shaped like `ollama.chat(stream=True)` output that replay a cached reply."""
+    for piece in _REPLAY_CHUNK.findall(raw):
+        yield {"message": {"role": "assistant", "content": piece}, "done": False}
+    yield {"message": {"role": "assistant", "content": ""}, "done": True, "done_reason": "cached"}
+
+
+class ResponseCache:
+    """Two-tier cache of raw model replies (with their <think> block).
+
+    A size-bounded LRU in memory sits in front of a SQLite table that keeps
+    up to `max_disk_entries` replies across restarts. Disk hits are promoted
+    to memory.
+    """
+
+    def __init__(self, path=RESPONSE_CACHE_PATH, max_bytes=RESPONSE_CACHE_BYTES,
+                 max_disk_entries=RESPONSE_CACHE_DISK_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_disk_entries = max_disk_entries
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._bytes = 0
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _remember(self, key, raw):
+        if key in self._memory:
+            self._bytes -= len(self._memory.pop(key).encode("utf-8"))
+        size = len(raw.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        self._memory[key] = raw
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._bytes -= len(evicted.encode("utf-8"))
+
+    def get(self, key):
+        """The cached raw reply for `key`, or None."""
+        if key is None:
+            return None
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+            row = None
+            if self._conn is not None:
+                row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET used_at = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, row[0])
+            return row[0]
+
+    def put(self, key, model, raw):
+        if key is None or not raw:
+            return
+        now = time.time()
+        with self._lock:
+            self._remember(key, raw)
+            if self._conn is None:
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, created_at, used_at) VALUES (?, ?, ?, ?, ?)",
+                (key, model, raw, now, now),
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+            if count > self.max_disk_entries:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY used_at LIMIT ?)",
+                    (count - self.max_disk_entries,),
+                )
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._bytes = 0
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM responses")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._bytes,
+            }
@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Concurrent generations per model; keep in line with the Ollama server's OLLAMA_NUM_PARALLEL
+NUM_PARALLEL = int(os.getenv("OLLAMA_NUM_PARALLEL", "4"))
+# Requests allowed to wait per model before new ones are turned away
+MAX_QUEUE = int(os.getenv("CHAT_MAX_QUEUE", "32"))
+# Generations one session may run at the same time on a model
+PER_SESSION = 1
+# Recent wait times kept for the queue statistics
+WAIT_SAMPLES = 256
+
+
+class QueueFull(Exception):
+    """Raised when a model's wait queue is at `max_queue`."""
+
+
+class Ticket:
+    """A request's place in a model's queue; `granted` once it holds a generation slot."""
+
+    def __init__(self, scheduler, model, session, clock):
+        self.scheduler = scheduler
+        self.model = model
+        self.session = session
+        self.enqueued_at = clock()
+        self.granted_at = None
+        self.released = False
+        self._event = threading.Event()
+
+    @property
+    def granted(self):
+        return self._event.is_set()
+
+    def wait(self, timeout=None):
+        """Block until the slot is granted or `timeout` passes; True if granted."""
+        return self._event.wait(timeout)
+
+    def position(self):
+        """1-based place in the model's queue (0 once granted); requests can only move up."""
+        return self.scheduler.position(self)
+
+    def release(self):
+        self.scheduler.release(self)
+
+
+class _ModelQueue:
+    def __init__(self):
+        self.active = 0
+        self.sessions = {}
+        self.waiting = deque()
+
+
+class RequestScheduler:
+    """Admission control for generations sent to one Ollama server.
+
+    Each model gets `num_parallel` slots. Requests beyond that wait in a FIFO
+    queue; a waiting request is skipped while its session already holds
+    `per_session` slots, so one session can't take them all. Requests past
+    `max_queue` are rejected with `QueueFull` instead of piling up. Queue
+    depth and wait times are kept for the debug panel.
+    """
+
+    def __init__(self, num_parallel=NUM_PARALLEL, max_queue=MAX_QUEUE, per_session=PER_SESSION,
+                 clock=time.monotonic):
+        self.num_parallel = max(num_parallel, 1)
+        self.max_queue = max_queue
+        self.per_session = max(per_session, 1)
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._models = {}
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+        self.granted = 0
+        self.rejected = 0
+        self.abandoned = 0
+
+    def enqueue(self, model, session=None):
+        """Queue a request for `model` and return its `Ticket` (granted right away if a slot is free)."""
+        ticket = Ticket(self, model, session, self.clock)
+        with self._lock:
+            queue = self._models.setdefault(model, _ModelQueue())
+            if len(queue.waiting) >= self.max_queue:
+                self.rejected += 1
+                raise QueueFull(f"{len(queue.waiting)} requests are already waiting for {model}")
+            queue.waiting.append(ticket)
+            self._dispatch(queue)
+        return ticket
+
+    def _eligible(self, queue, ticket):
+        return queue.sessions.get(ticket.session, 0) < self.per_session
+
+    def _dispatch(self, queue):
+        while queue.active < self.num_parallel:
+            ticket = next((t for t in queue.waiting if self._eligible(queue, t)), None)
+            if ticket is None:
+                return
+            queue.waiting.remove(ticket)
+            queue.active += 1
+            queue.sessions[ticket.session] = queue.sessions.get(ticket.session, 0) + 1
+            ticket.granted_at = self.clock()
+            self._waits.append(ticket.granted_at - ticket.enqueued_at)
+            self.granted += 1
+            ticket._event.set()
+
+    def position(self, ticket):
+        with self._lock:
+            if ticket.granted:
+                return 0
+            return self._models[ticket.model].waiting.index(ticket) + 1
+
+    def release(self, ticket):
+        """Give back the slot, or leave the queue if the slot was never granted. Idempotent."""
+        with self._lock:
+            if ticket.released:
+                return
+            ticket.released = True
+            queue = self._models[ticket.model]
+            if ticket.granted:
+                queue.active -= 1
+                queue.sessions[ticket.session] -= 1
+                if not queue.sessions[ticket.session]:
+                    del queue.sessions[ticket.session]
+            else:
+                queue.waiting.remove(ticket)
+                self.abandoned += 1
+            self._dispatch(queue)
+
+    @contextmanager
+    def slot(self, model, session=None, on_wait=None, poll_interval=0.5):
+        """Hold a generation slot for the duration of the block.
+
+        While queued, `on_wait(position)` is called every `poll_interval` seconds.
+        """
+        ticket = self.enqueue(model, session)
+        try:
+            while not ticket.wait(poll_interval if on_wait is not None else None):
+                on_wait(ticket.position())
+            yield ticket
+        finally:
+            ticket.release()
+
+    def stats(self):
+        with self._lock:
+            waits = sorted(self._waits)
+            models = {
+                name: {"active": queue.active, "queued": len(queue.waiting)}
+                for name, queue in self._models.items()
+            }
+            return {
+                "num_parallel": self.num_parallel,
+                "models": models,
+                "queued": sum(m["queued"] for m in models.values()),
+                "active": sum(m["active"] for m in models.values()),
+                "granted": self.granted,
+                "rejected": self.rejected,
+                "abandoned": self.abandoned,
+                "wait_avg": sum(waits) / len(waits) if waits else None,
+                "wait_p95": waits[min(int(len(waits) * 0.95), len(waits) - 1)] if waits else None,
+                "wait_max": waits[-1] if waits else None,
+            }
@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+
+from .client import get_client
+from .vector_store import VECTOR_DTYPE, VectorStore, normalize
+
+# Off by default: a near-duplicate prompt gets the reply cached for the earlier one
+SEMANTIC_CACHE_ENABLED = os.getenv("CHAT_SEMANTIC_CACHE", "0").lower() in ("1", "true", "yes")
+EMBED_MODEL = os.getenv("CHAT_EMBED_MODEL", "nomic-embed-text")
+# Minimum cosine similarity for a cached reply to be served
+SEMANTIC_THRESHOLD = float(os.getenv("CHAT_SEMANTIC_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_ENTRIES = int(os.getenv("CHAT_SEMANTIC_CACHE_ENTRIES", "1000"))
+
+
+class SemanticCache:
+    """Serve cached replies for prompts that mean the same thing as an earlier one.
+
+    Prompts are embedded with `ollama.embed` (or any `embed(texts)` callable
+    returning one vector per text) and kept in an in-memory `VectorStore`,
+    so a lookup is a single vectorized similarity search. Entries are only
+    compared within the same `scope`, e.g. the same model digest and the
+    same conversation so far, so a short follow-up like "tell me more" can
+    never pick up a reply from another conversation. When the cache is full
+    the least recently used entry is dropped.
+    """
+
+    def __init__(self, embed_model=EMBED_MODEL, threshold=SEMANTIC_THRESHOLD, max_entries=SEMANTIC_CACHE_ENTRIES,
+                 client=None, embed=None, clock=time.monotonic, dtype=VECTOR_DTYPE):
+        self.embed_model = embed_model
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.clock = clock
+        self._client = client
+        self._embed = embed
+        self._lock = threading.Lock()
+        self._vectors = VectorStore(dtype=dtype)
+        self._replies = {}
+        self._used = {}
+        self._entry_scopes = {}
+        self._scopes = {}
+        self._next_id = 0
+        self.hits = 0
+        self.misses = 0
+        self.embed_calls = 0
+        self.embed_seconds = 0.0
+        self.last_similarity = None
+
+    def embed(self, text):
+        """The normalized float32 embedding of `text`."""
+        started = time.perf_counter()
+        if self._embed is not None:
+            vector = self._embed([text])[0]
+        else:
+            client = self._client or get_client()
+            vector = client.embed(model=self.embed_model, input=[text])["embeddings"][0]
+        self.embed_calls += 1
+        self.embed_seconds += time.perf_counter() - started
+        return normalize(vector)
+
+    def lookup(self, scope, text):
+        """Return `(reply, similarity, vector)`; `reply` is None below the threshold.
+
+        Pass `vector` back to `add()` so the prompt isn't embedded twice.
+        """
+        vector = self.embed(text)
+        with self._lock:
+            candidates = self._scopes.get(scope)
+            matches = self._vectors.search(vector, 1, candidates) if candidates else []
+            if not matches:
+                self.misses += 1
+                return None, None, vector
+            entry_id, similarity = matches[0]
+            self.last_similarity = similarity
+            if similarity < self.threshold:
+                self.misses += 1
+                return None, similarity, vector
+            self.hits += 1
+            self._used[entry_id] = self.clock()
+            return self._replies[entry_id], similarity, vector
+
+    def _forget(self, entry_ids):
+        self._vectors.delete(entry_ids)
+        for entry_id in entry_ids:
+            del self._replies[entry_id]
+            del self._used[entry_id]
+            scope = self._entry_scopes.pop(entry_id)
+            self._scopes[scope].discard(entry_id)
+            if not self._scopes[scope]:
+                del self._scopes[scope]
+
+    def add(self, scope, vector, reply):
+        if not reply:
+            return
+        with self._lock:
+            if self._vectors.dim is not None and self._vectors.dim != vector.shape[-1]:
+                # The embedding model changed: earlier vectors can't be compared with new ones
+                self._forget(list(self._replies))
+                self._vectors.clear()
+            if len(self._replies) >= self.max_entries:
+                self._forget([min(self._used, key=self._used.get)])
+            entry_id = self._next_id
+            self._next_id += 1
+            self._vectors.append([entry_id], [vector])
+            self._replies[entry_id] = reply
+            self._used[entry_id] = self.clock()
+            self._entry_scopes[entry_id] = scope
+            self._scopes.setdefault(scope, set()).add(entry_id)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "entries": len(self._replies),
+                "threshold": self.threshold,
+                "last_similarity": self.last_similarity,
+                "embed_ms_avg": self.embed_seconds * 1000 / self.embed_calls if self.embed_calls else None,
+            }
@@ -0,0 +1,170 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import replace
+
+from .history import ChatMessage
+
+DEFAULT_DB_PATH = os.getenv("CHAT_DB_PATH", "chat_history.db")
+# Messages per history page loaded from the store
+PAGE_SIZE = 50
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    id TEXT PRIMARY KEY,
+    profile TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    summary TEXT NOT NULL DEFAULT '',
+    summarized INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS messages (
+    conversation_id TEXT NOT NULL REFERENCES conversations(id),
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    think TEXT,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (conversation_id, seq)
+) WITHOUT ROWID;
+"""
+
+
+def _row_to_message(seq, role, content, think):
+    return ChatMessage(role, content, think or "", seq)
+
+
+class ConversationStore:
+    """Append-only SQLite (WAL) store for chat transcripts.
+
+    Messages are written one row per turn and read back a page at a time,
+    newest first, so a session only needs to hold the tail of its
+    conversation in memory. Older pages never change once written, which
+    lets them be shared across sessions in a small LRU cache. The only
+    change after the fact is `discard_last()`, which withdraws the newest
+    message when its turn failed.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, page_cache_size=256):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._pages = OrderedDict()
+        self.page_cache_size = page_cache_size
+        self.page_hits = 0
+        self.page_misses = 0
+
+    def create(self, profile):
+        """Start a new conversation and return its id."""
+        conversation_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO conversations (id, profile, created_at, updated_at) VALUES (?, ?, ?, ?)",
+                (conversation_id, profile, now, now),
+            )
+        return conversation_id
+
+    def exists(self, conversation_id):
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM conversations WHERE id = ?", (conversation_id,)).fetchone()
+        return row is not None
+
+    def append(self, conversation_id, message):
+        """Append one message and return it with its sequence number set."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                (seq,) = self._conn.execute(
+                    "SELECT COALESCE(MAX(seq) + 1, 0) FROM messages WHERE conversation_id = ?", (conversation_id,)
+                ).fetchone()
+                self._conn.execute(
+                    "INSERT INTO messages (conversation_id, seq, role, content, think, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (conversation_id, seq, message.role, message.content, message.think, now),
+                )
+                self._conn.execute("UPDATE conversations SET updated_at = ? WHERE id = ?", (now, conversation_id))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return replace(message, seq=seq)
+
+    def discard_last(self, conversation_id, seq):
+        """Delete message `seq` if it is still the newest in the conversation."""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM messages WHERE conversation_id = ? AND seq = ? "
+                "AND seq = (SELECT MAX(seq) FROM messages WHERE conversation_id = ?)",
+                (conversation_id, seq, conversation_id),
+            )
+
+    def page(self, conversation_id, before=None, limit=PAGE_SIZE):
+        """Up to `limit` messages (oldest first) preceding sequence number `before`.
+
+        With `before=None` the latest page is returned. Pages with an explicit
+        `before` are immutable and cached.
+        """
+        key = (conversation_id, before, limit)
+        if before is not None:
+            with self._lock:
+                if key in self._pages:
+                    self._pages.move_to_end(key)
+                    self.page_hits += 1
+                    return list(self._pages[key])
+                self.page_misses += 1
+
+        query = "SELECT seq, role, content, think FROM messages WHERE conversation_id = ?"
+        params = [conversation_id]
+        if before is not None:
+            query += " AND seq < ?"
+            params.append(before)
+        query += " ORDER BY seq DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        messages = [_row_to_message(*row) for row in reversed(rows)]
+
+        if before is not None:
+            with self._lock:
+                self._pages[key] = messages
+                while len(self._pages) > self.page_cache_size:
+                    self._pages.popitem(last=False)
+        return list(messages)
+
+    def count(self, conversation_id):
+        with self._lock:
+            (count,) = self._conn.execute(
+                "SELECT COUNT(*) FROM messages WHERE conversation_id = ?", (conversation_id,)
+            ).fetchone()
+        return count
+
+    def load_summary(self, conversation_id):
+        """The (summary, summarized message count) saved for a conversation."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary, summarized FROM conversations WHERE id = ?", (conversation_id,)
+            ).fetchone()
+        return row if row else ("", 0)
+
+    def save_summary(self, conversation_id, summary, summarized):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE conversations SET summary = ?, summarized = ? WHERE id = ?",
+                (summary, summarized, conversation_id),
+            )
+
+    def stats(self):
+        with self._lock:
+            return {
+                "page_hits": self.page_hits,
+                "page_misses": self.page_misses,
+                "cached_pages": len(self._pages),
+            }
@@ -0,0 +1,216 @@
+import os
+import time
+from dataclasses import dataclass, field
+
+from .buffer import ResponseBuffer
+from .think import ANSWER, THINK, ThinkStreamParser
+
+# Timing fields Ollama reports on the final chunk of a stream (durations in nanoseconds)
+OLLAMA_STAT_FIELDS = (
+    "total_duration",
+    "load_duration",
+    "prompt_eval_count",
+    "prompt_eval_duration",
+    "eval_count",
+    "eval_duration",
+)
+
+# Default flush cadence for streamed responses; override with CHAT_RENDER_HZ / CHAT_RENDER_EVERY
+DEFAULT_MAX_HZ = float(os.getenv("CHAT_RENDER_HZ", "20"))
+DEFAULT_EVERY_N_TOKENS = int(os.getenv("CHAT_RENDER_EVERY", "0"))
+
+
+class RenderScheduler:
+    """Coalesce streamed tokens and push them to the UI at a bounded rate.
+
+    `render` is called with the text to display (e.g. `placeholder.markdown`).
+    A flush happens when `1 / max_hz` seconds have passed since the previous
+    one, or after `every_n_tokens` tokens if that is set, instead of once per
+    token.
+    """
+
+    def __init__(self, render=None, max_hz=None, every_n_tokens=None, cursor="▌", clock=time.perf_counter):
+        self.render = render
+        self.max_hz = DEFAULT_MAX_HZ if max_hz is None else max_hz
+        self.every_n_tokens = DEFAULT_EVERY_N_TOKENS if every_n_tokens is None else every_n_tokens
+        self.cursor = cursor
+        self.clock = clock
+        self.buffer = ResponseBuffer()
+        self.interval = 1.0 / self.max_hz if self.max_hz > 0 else 0.0
+        self.tokens = 0
+        self.flushes = 0
+        self.last_flush_at = None
+        self._tokens_since_flush = 0
+
+    def push(self, text):
+        """Add one streamed token; flush to the UI if the cadence allows it."""
+        if not text:
+            return
+        now = self.clock()
+        self.buffer.append(text)
+        self.tokens += 1
+        self._tokens_since_flush += 1
+
+        if self.every_n_tokens and self._tokens_since_flush >= self.every_n_tokens:
+            self.flush(now)
+        elif self.last_flush_at is None or now - self.last_flush_at >= self.interval:
+            self.flush(now)
+
+    @property
+    def pending(self):
+        """Tokens received since the last flush, i.e. not shown yet."""
+        return self._tokens_since_flush
+
+    def flush(self, now=None, final=False):
+        if self.render is not None:
+            self.render(self.buffer.render("" if final else self.cursor))
+        self.flushes += 1
+        self.last_flush_at = self.clock() if now is None else now
+        self._tokens_since_flush = 0
+
+    def finish(self):
+        """Render the final text without the cursor and return it."""
+        text = self.buffer.getvalue()
+        if self._tokens_since_flush or self.flushes == 0 or self.cursor:
+            self.flush(final=True)
+        return text
+
+
+def stream_stats(tokens, flushes, started_at, first_token_at, finished_at, ollama_stats):
+    """Delivery rate, generation rate and TTFT for one stream, plus Ollama's own timings."""
+    delivered_tps = None
+    if first_token_at is not None and finished_at is not None:
+        elapsed = finished_at - first_token_at
+        if elapsed > 0:
+            delivered_tps = tokens / elapsed
+
+    generated_tps = None
+    eval_count = ollama_stats.get("eval_count")
+    eval_duration = ollama_stats.get("eval_duration")
+    if eval_count and eval_duration:
+        generated_tps = eval_count / (eval_duration / 1e9)
+
+    ttft = None
+    if first_token_at is not None:
+        ttft = first_token_at - started_at
+
+    stats = {
+        "tokens": tokens,
+        "flushes": flushes,
+        "delivered_tps": delivered_tps,
+        "generated_tps": generated_tps,
+        "ttft": ttft,
+    }
+    stats.update(ollama_stats)
+    return stats
+
+
+def summarize_stats(stats):
+    """One-line tokens/sec delivered vs generated, for an st.caption."""
+    delivered = f"{stats['delivered_tps']:.1f}" if stats["delivered_tps"] else "N/A"
+    generated = f"{stats['generated_tps']:.1f}" if stats["generated_tps"] else "N/A"
+    summary = (f"⚡ {delivered} tok/s delivered · {generated} tok/s generated by Ollama · "
+               f"{stats['flushes']} UI updates for {stats['tokens']} tokens")
+    if stats.get("ttft") is not None:
+        summary += f" · TTFT {stats['ttft'] * 1000:.0f} ms"
+    if stats.get("prompt_eval_duration") is not None:
+        summary += (f" · prompt eval {stats.get('prompt_eval_count') or 0} tokens in "
+                    f"{stats['prompt_eval_duration'] / 1e6:.0f} ms")
+    return summary
+
+
+def iter_content(response_stream, on_chunk=None):
+    """Yield the text of each `ollama.chat(stream=True)` chunk, skipping empty ones."""
+    for chunk in response_stream:
+        if on_chunk is not None:
+            on_chunk(chunk)
+        content = chunk.get("message", {}).get("content", "")
+        if content:
+            yield content
+
+
+@dataclass
+class Reply:
+    raw: str
+    answer: str
+    think: str
+    stats: dict = field(default_factory=dict)
+    final_chunk: object = None
+
+    @property
+    def summary(self):
+        return summarize_stats(self.stats)
+
+
+class ReplyPipeline:
+    """Route one streamed reply through the think parser and render schedulers.
+
+    Think/answer separation happens here, once, while the reply streams:
+    `render` receives the answer text and `render_think` the reasoning text,
+    each at the scheduler's cadence. Both are optional, so the same pipeline
+    runs headless in benchmarks.
+    """
+
+    def __init__(self, render=None, render_think=None, clock=time.perf_counter):
+        self.clock = clock
+        self.answer_scheduler = RenderScheduler(render, clock=clock)
+        self.think_scheduler = RenderScheduler(render_think, cursor="", clock=clock)
+        self._schedulers = {THINK: self.think_scheduler, ANSWER: self.answer_scheduler}
+        self.parser = ThinkStreamParser()
+        self.raw = ResponseBuffer()
+        self.chunks = 0
+        self.started_at = clock()
+        self.first_token_at = None
+        self.final_chunk = None
+        self.ollama_stats = {}
+
+    def observe(self, chunk):
+        if chunk.get("done"):
+            self.final_chunk = chunk
+            self.ollama_stats = {name: chunk.get(name) for name in OLLAMA_STAT_FIELDS}
+
+    def feed(self, content):
+        if self.first_token_at is None:
+            self.first_token_at = self.clock()
+        self.chunks += 1
+        self.raw.append(content)
+        for name, text in self.parser.feed(content):
+            self._schedulers[name].push(text)
+
+    def heartbeat(self):
+        """While waiting on the model, show text the flush cadence held back.
+
+        Before anything is shown the cursor is drawn once, replacing e.g. a
+        queue message; otherwise an idle stream renders nothing.
+        """
+        for scheduler in (self.think_scheduler, self.answer_scheduler):
+            if scheduler.pending:
+                scheduler.flush()
+        if not self.answer_scheduler.flushes:
+            self.answer_scheduler.flush()
+
+    def consume(self, response_stream):
+        for content in iter_content(response_stream, self.observe):
+            self.feed(content)
+        return self.finish()
+
+    def _reply(self):
+        stats = stream_stats(self.chunks, self.think_scheduler.flushes + self.answer_scheduler.flushes,
+                             self.started_at, self.first_token_at, self.clock(), self.ollama_stats)
+        return Reply(raw=self.raw.getvalue(), answer=self.parser.answer, think=self.parser.think,
+                     stats=stats, final_chunk=self.final_chunk)
+
+    def finish(self):
+        """Flush the last text to the UI and return the completed reply."""
+        for name, text in self.parser.close():
+            self._schedulers[name].push(text)
+        if self.think_scheduler.tokens:
+            self.think_scheduler.finish()
+        self.answer_scheduler.finish()
+        return self._reply()
+
+    def partial(self):
+        """The reply so far, without rendering (for a stream that was interrupted)."""
+        self.parser.close()
+        return self._reply()
+
@@ -0,0 +1,100 @@
+THINK = "think"
+ANSWER = "answer"
+
+OPEN_TAG = "<think>"
+CLOSE_TAG = "</think>"
+
+
+def _partial_tag_length(text, tag):
+    """Length of the longest suffix of `text` that is a proper prefix of `tag`."""
+    for size in range(min(len(tag) - 1, len(text)), 0, -1):
+        if text.endswith(tag[:size]):
+            return size
+    return 0
+
+
+class ThinkStreamParser:
+    """Incrementally split a streamed response into "think" and "answer" channels.
+
+    Each call to `feed` only looks at the new chunk plus at most a tag's worth
+    of carried-over text, so parsing a whole response is O(n) instead of
+    re-running a regex over the growing buffer on every chunk. Tags that are
+    split across chunk boundaries are held back until they can be resolved.
+    """
+
+    def __init__(self, open_tag=OPEN_TAG, close_tag=CLOSE_TAG):
+        self.open_tag = open_tag
+        self.close_tag = close_tag
+        self.in_think = False
+        self._pending = ""
+        self._parts = {THINK: [], ANSWER: []}
+
+    def _emit(self, segments, channel, text):
+        if text:
+            self._parts[channel].append(text)
+            segments.append((channel, text))
+
+    def feed(self, chunk):
+        """Consume one chunk and return the list of (channel, text) segments it produced."""
+        segments = []
+        data = self._pending + chunk
+        self._pending = ""
+
+        while data:
+            channel = THINK if self.in_think else ANSWER
+            tag = self.close_tag if self.in_think else self.open_tag
+            index = data.find(tag)
+            if index != -1:
+                self._emit(segments, channel, data[:index])
+                data = data[index + len(tag):]
+                self.in_think = not self.in_think
+                continue
+
+            keep = _partial_tag_length(data, tag)
+            if keep:
+                self._pending = data[-keep:]
+                data = data[:-keep]
+            self._emit(segments, channel, data)
+            break
+
+        return segments
+
+    def close(self):
+        """Flush any held-back text at the end of the stream."""
+        segments = []
+        if self._pending:
+            self._emit(segments, THINK if self.in_think else ANSWER, self._pending)
+            self._pending = ""
+        return segments
+
+    @property
+    def think(self):
+        return "".join(self._parts[THINK]).strip()
+
+    @property
+    def answer(self):
+        return "".join(self._parts[ANSWER]).strip()
+
+
+def parse_stream(chunks, parser=None):
+    """Yield (channel, text) segments for an iterable of text chunks."""
+    parser = parser or ThinkStreamParser()
+    for chunk in chunks:
+        if chunk:
+            yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+def channel(segments, name):
+    """Filter a (channel, text) segment stream down to the text of one channel."""
+    for segment_channel, text in segments:
+        if segment_channel == name:
+            yield text
+
+
+def split_think(text):
+    """Split a complete response into (answer, think) in a single pass."""
+    parser = ThinkStreamParser()
+    parser.feed(text)
+    parser.close()
+    return parser.answer, parser.think
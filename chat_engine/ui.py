@@ -0,0 +1,630 @@
+import json
+import os
+import shutil
+import uuid
+from contextlib import nullcontext
+
+import streamlit as st
+
+from .catalog import ModelCatalog
+from .async_client import get_async_client, start_chat
+from .cassette import CASSETTE_MODE, CASSETTE_PATH, REPLAY_SPEED, Cassette
+from .client import make_client
+from .history import ConversationMemory, assistant_message, context_window, summarize_turns, user_message
+from .metrics import (ACTIVE_STREAMS, METRICS_ENABLED, METRICS_HOST, METRICS_PORT, REGISTRY, MetricsServer,
+                      cache_families, pool_families, record_reply, scheduler_families)
+from .profiler import PROFILE_ENABLED, PROFILE_QUERY_PARAM, SectionProfiler
+from .rag import RAG_ENABLED, RAG_FOLDER, TEXT_SUFFIXES, UPLOAD_PREFIX, DocumentIndex
+from .response_cache import RESPONSE_CACHE_ENABLED, ResponseCache, cache_key, replay_stream
+from .scheduler import QueueFull, RequestScheduler
+from .semantic_cache import SEMANTIC_CACHE_ENABLED, SemanticCache
+from .store import PAGE_SIZE, ConversationStore
+from .streaming import ReplyPipeline
+
+# Messages kept in each session's memory; older ones stay in the conversation store
+MAX_SESSION_MESSAGES = 2 * PAGE_SIZE
+# Messages rendered on each rerun; earlier ones sit behind a "load earlier" button
+HISTORY_WINDOW = int(os.getenv("CHAT_HISTORY_WINDOW", "20"))
+# Seconds between queue position updates while a prompt waits for a generation slot
+QUEUE_POLL_INTERVAL = 0.5
+
+
+# === Function: Shared Ollama client (one connection pool per server process) ===
+@st.cache_resource
+def get_ollama_client():
+    return make_client()
+
+
+# === Function: Shared model catalog (one per server process, not per session) ===
+@st.cache_resource
+def get_model_catalog():
+    return ModelCatalog(client=get_ollama_client())
+
+
+# === Function: Shared request scheduler (one generation queue per server process) ===
+@st.cache_resource
+def get_request_scheduler():
+    return RequestScheduler()
+
+
+# === Function: Shared response cache (None unless CHAT_RESPONSE_CACHE is set) ===
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache() if RESPONSE_CACHE_ENABLED else None
+
+
+# === Function: Shared semantic cache (None unless CHAT_SEMANTIC_CACHE is set) ===
+@st.cache_resource
+def get_semantic_cache():
+    return SemanticCache(client=get_ollama_client()) if SEMANTIC_CACHE_ENABLED else None
+
+
+# === Function: Prometheus endpoint for this server process (None unless CHAT_METRICS_PORT is set) ===
+@st.cache_resource
+def get_metrics_server():
+    if not METRICS_ENABLED:
+        return None
+    try:
+        server = MetricsServer()
+    except OSError as e:
+        st.warning(f"⚠️ Metrics endpoint unavailable on port {METRICS_PORT}. Error: {str(e)}")
+        return None
+    # Queue, cache and pool numbers are read from their own stats when scraped
+    scheduler = get_request_scheduler()
+    REGISTRY.register_collector("scheduler", lambda: scheduler_families(scheduler))
+    catalog = get_model_catalog()
+    caches = {
+        "model_list": lambda: (catalog.stats()["hits"], catalog.stats()["misses"]),
+        "model_info": lambda: (catalog.stats()["show_hits"], catalog.stats()["show_misses"]),
+    }
+    for name, cache in (("response", get_response_cache()), ("semantic", get_semantic_cache())):
+        if cache is not None:
+            caches[name] = lambda cache=cache: (cache.stats()["hits"], cache.stats()["misses"])
+    REGISTRY.register_collector("caches", lambda: cache_families(caches))
+    clients = {"sync": get_ollama_client(), "stream": get_async_client()}
+    REGISTRY.register_collector("pools", lambda: pool_families(clients))
+    return server
+
+
+# === Function: Shared rerun profiler (it only records while profiling is on) ===
+@st.cache_resource
+def get_profiler():
+    return SectionProfiler()
+
+
+# === Function: Is this rerun being profiled (CHAT_PROFILE, or ?profile=1 earlier in the session) ===
+def profiling_enabled():
+    return PROFILE_ENABLED or st.session_state.get("profiling", False)
+
+
+# === Function: Time a named part of the rerun (does nothing unless profiling is on) ===
+def section(name):
+    return get_profiler().section(name) if profiling_enabled() else nullcontext()
+
+
+# === Function: Shared cassette of recorded streams (None unless CHAT_CASSETTE is set) ===
+@st.cache_resource
+def get_cassette():
+    return Cassette(CASSETTE_PATH) if CASSETTE_PATH else None
+
+
+# === Function: Digest of an installed model (None if unknown) ===
+def model_digest(model_name):
+    try:
+        entry = get_model_catalog().entry(model_name)
+    except Exception:
+        return None
+    return entry.digest if entry else None
+
+
+# === Function: Look up a reply for `context` in the exact and semantic caches ===
+def lookup_cached_reply(model_name, context, prompt):
+    """Return (reply, caption, store) where `store(raw)` caches a freshly generated reply."""
+    response_cache = get_response_cache()
+    semantic_cache = get_semantic_cache()
+    if response_cache is None and semantic_cache is None:
+        return None, None, None
+    digest = model_digest(model_name)
+    key = cache_key(model_name, digest, context)
+    if key is None:
+        return None, None, None
+
+    if response_cache is not None:
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached, "♻️ Served from the response cache", None
+
+    vector = None
+    # Near-duplicates are only matched against requests with the same conversation before them
+    scope = cache_key(model_name, digest, context[:-1])
+    if semantic_cache is not None:
+        try:
+            cached, similarity, vector = semantic_cache.lookup(scope, prompt)
+        except Exception as e:
+            st.warning(f"⚠️ Semantic cache unavailable. Error: {str(e)}")
+        else:
+            if cached is not None:
+                return cached, f"♻️ Served from the semantic cache (similarity {similarity:.2f})", None
+
+    def store(raw):
+        if response_cache is not None:
+            response_cache.put(key, model_name, raw)
+        if vector is not None:
+            semantic_cache.add(scope, vector, raw)
+
+    return None, None, store
+
+
+# === Function: Shared document index for retrieval (None unless CHAT_RAG is set) ===
+@st.cache_resource
+def get_document_index():
+    if not RAG_ENABLED:
+        return None
+    index = DocumentIndex(client=get_ollama_client())
+    if RAG_FOLDER:
+        index.watch(RAG_FOLDER)
+    return index
+
+
+# === Function: Retrieve document passages relevant to a prompt ===
+def retrieve_passages(prompt):
+    index = get_document_index()
+    if index is None:
+        return []
+    try:
+        return index.search(prompt)
+    except Exception as e:
+        st.warning(f"⚠️ Could not search your documents. Error: {str(e)}")
+        return []
+
+
+# === Function: Shared conversation store (one SQLite connection per server process) ===
+@st.cache_resource
+def get_conversation_store():
+    return ConversationStore()
+
+
+# === Function: Check for available model ===
+def check_model_availability(profile):
+    try:
+        name = get_model_catalog().find(profile.prefix)
+        if name:
+            st.session_state.model_name = name
+            return True
+        return False
+    except Exception as e:
+        with st.sidebar:
+            with st.expander("Debug Information"):
+                st.error(f"Error checking model availability: {str(e)}")
+        return False
+
+
+# === Display chat history ===
+def load_earlier_messages():
+    st.session_state.history_limit += PAGE_SIZE
+    messages = st.session_state.messages
+    if len(messages) < st.session_state.history_limit and messages and messages[0].seq:
+        earlier = get_conversation_store().page(st.session_state.conversation_id, before=messages[0].seq)
+        messages[:0] = earlier
+
+
+def render_history():
+    messages = st.session_state.messages
+    limit = st.session_state.history_limit
+    has_earlier = len(messages) > limit or (messages and messages[0].seq)
+    if has_earlier and st.button("⬆️ Load earlier messages"):
+        load_earlier_messages()
+        st.rerun()
+
+    # Only the most recent messages are rendered on each rerun; they are
+    # stored already split into answer and think, so nothing is re-parsed
+    for message in messages[-limit:]:
+        with st.chat_message(message.role):
+            if message.think:
+                with st.expander("🧠 What the chat-bot thought..."):
+                    st.markdown(message.think)
+            st.markdown(message.content)
+
+
+# === Function: Build the multi-turn context for a new prompt ===
+def build_context(profile, prompt, passages=()):
+    model_name = st.session_state.model_name
+    try:
+        num_ctx = context_window(get_model_catalog().show(model_name))
+    except Exception:
+        num_ctx = context_window(None)
+
+    def summarize(previous_summary, evicted, max_tokens):
+        try:
+            with get_request_scheduler().slot(model_name, st.session_state.session_id):
+                return summarize_turns(model_name, previous_summary, evicted, max_tokens,
+                                       client=get_ollama_client(), keep_alive=profile.keep_alive)
+        except Exception as e:
+            st.warning(f"⚠️ Could not summarize earlier messages. Error: {str(e)}")
+            return previous_summary
+
+    memory = st.session_state.memory
+    summarized = memory.summarized
+    documents = [f"[{passage.label}]\n{passage.text}" for passage in passages]
+    context = memory.build(prompt, num_ctx, summarize, documents)
+    if memory.summarized != summarized and st.session_state.conversation_id:
+        get_conversation_store().save_summary(st.session_state.conversation_id, memory.summary, memory.summarized)
+    return context
+
+
+# === Function: Persist a new message and add it to the session ===
+def record_message(profile, message):
+    store = get_conversation_store()
+    if not st.session_state.conversation_id:
+        st.session_state.conversation_id = store.create(profile.prefix)
+        st.query_params["c"] = st.session_state.conversation_id
+    message = store.append(st.session_state.conversation_id, message)
+
+    messages = st.session_state.messages
+    messages.append(message)
+    # Only the tail of the conversation is kept in memory
+    keep = max(MAX_SESSION_MESSAGES, st.session_state.history_limit)
+    if len(messages) > keep:
+        del messages[:-keep]
+    st.session_state.memory.add(message)
+    return message
+
+
+# === Function: Withdraw the newest message when its turn failed, so user and assistant keep alternating ===
+def discard_message(message):
+    get_conversation_store().discard_last(st.session_state.conversation_id, message.seq)
+    messages = st.session_state.messages
+    if messages and messages[-1].seq == message.seq:
+        messages.pop()
+    st.session_state.memory.discard_last()
+
+
+# === Chat input box ===
+def handle_prompt(profile, prompt):
+    with section("retrieval"):
+        passages = retrieve_passages(prompt)
+    with section("context"):
+        context = build_context(profile, prompt, passages)
+    passages = passages[:st.session_state.memory.documents_used]
+
+    with st.chat_message("user"):
+        st.markdown(prompt)
+
+    pending = record_message(profile, user_message(prompt))
+
+    # Stream the reasoning and the answer into separate placeholders as they arrive
+    with st.chat_message("assistant"):
+        think_placeholder = st.empty()
+        message_placeholder = st.empty()
+
+        def render_think(text):
+            with think_placeholder.expander("🧠 What the assistant is thinking..."):
+                st.markdown(text.strip())
+
+        pipeline = ReplyPipeline(render=message_placeholder.markdown, render_think=render_think)
+        stop_placeholder = st.empty()
+        # Clicking this (or sending a new prompt) interrupts the script run, which cancels the request below
+        stop_placeholder.button("⏹ Stop generating")
+        model_name = st.session_state.model_name
+        with section("cache lookup"):
+            cached, cached_caption, store_reply = lookup_cached_reply(model_name, context, prompt)
+        cassette = get_cassette()
+        ticket = None
+        response_stream = None
+        try:
+            if cached is not None:
+                # Replayed through the same pipeline, so it renders like a (very fast) live reply
+                source = "cache"
+                with section("generate"):
+                    reply = pipeline.consume(replay_stream(cached))
+            elif cassette is not None and CASSETTE_MODE == "replay":
+                # Recorded traffic instead of Ollama, to profile the UI apart from the model
+                response_stream = cassette.replay(model_name, context, on_idle=pipeline.heartbeat)
+                source = "cassette"
+                with section("generate"):
+                    reply = pipeline.consume(response_stream)
+            else:
+                # Wait for a free generation slot on this model, showing our place in line
+                with section("queue wait"):
+                    ticket = get_request_scheduler().enqueue(model_name, st.session_state.session_id)
+                    while not ticket.wait(QUEUE_POLL_INTERVAL):
+                        message_placeholder.markdown(f"⏳ Waiting for {model_name}: #{ticket.position()} in line")
+                response_stream = start_chat(model_name, context, on_idle=pipeline.heartbeat,
+                                             keep_alive=profile.keep_alive)
+                if cassette is not None:
+                    response_stream = cassette.record(response_stream, model_name, context)
+                source = "ollama"
+                if METRICS_ENABLED:
+                    ACTIVE_STREAMS.inc(model=model_name)
+                try:
+                    with section("generate"):
+                        reply = pipeline.consume(response_stream)
+                finally:
+                    if METRICS_ENABLED:
+                        ACTIVE_STREAMS.dec(model=model_name)
+        except QueueFull:
+            stop_placeholder.empty()
+            message_placeholder.empty()
+            discard_message(pending)
+            st.error("🚦 Too many requests are waiting for this model. Please try again in a moment.")
+            return
+        except Exception as e:
+            stop_placeholder.empty()
+            # Keep what was generated before the failure; with nothing to keep, take the prompt back
+            partial = pipeline.partial()
+            if partial.answer or partial.think:
+                record_message(profile, assistant_message(partial.answer, partial.think))
+            else:
+                discard_message(pending)
+            st.error(f"❌ Error: {str(e)}")
+            return
+        except BaseException:
+            # Streamlit stopped this run: keep whatever was generated before the stop, or take the prompt back
+            partial = pipeline.partial()
+            if partial.answer or partial.think:
+                record_message(profile, assistant_message(partial.answer, partial.think))
+            else:
+                discard_message(pending)
+            raise
+        finally:
+            if response_stream is not None:
+                response_stream.cancel()
+            if ticket is not None:
+                ticket.release()
+        stop_placeholder.empty()
+        if METRICS_ENABLED:
+            record_reply(model_name, reply.stats, source)
+        if not reply.answer:
+            message_placeholder.markdown(profile.empty_response)
+        if passages:
+            with st.expander(f"📚 Sources ({len(passages)})"):
+                for passage in passages:
+                    st.markdown(f"**{passage.label}** · similarity {passage.score:.2f}")
+                    st.text(passage.text[:300])
+        if cached is not None:
+            st.caption(cached_caption)
+        else:
+            st.caption(reply.summary)
+            if store_reply is not None and reply.answer and reply.final_chunk is not None:
+                with section("save"):
+                    store_reply(reply.raw)
+
+    # Stored already split, so later reruns never parse this reply again
+    with section("save"):
+        record_message(profile, assistant_message(reply.answer, reply.think))
+
+
+# === Sidebar Info ===
+def render_sidebar(profile):
+    with st.sidebar:
+        st.header("About")
+        st.markdown(f"""
+        This chatbot uses:
+        - {profile.about}
+        - **Ollama** - For running the model locally
+        - **Streamlit** - For the web interface
+        """)
+
+        if st.button("➕ New conversation"):
+            st.query_params.clear()
+            load_conversation(profile)
+            st.rerun()
+
+        st.subheader("Model Being Used")
+        with section("model check"):
+            available = check_model_availability(profile)
+        if available:
+            st.success(f"Using model: **{st.session_state.model_name}**")
+            st.markdown(f"""
+            You can run this model directly with:
+            ```bash
+            ollama run {st.session_state.model_name}
+            ```
+            """)
+        else:
+            st.error(f"No {profile.name} model found")
+            st.markdown(f"""
+            Please pull the model with:
+            ```bash
+            ollama pull {profile.default_model}
+            ```
+            """)
+
+        with section("documents"):
+            index = get_document_index()
+            if index is not None:
+                st.subheader("Documents")
+                uploads = st.file_uploader("Add documents to chat with", accept_multiple_files=True,
+                                           type=[suffix.lstrip(".") for suffix in TEXT_SUFFIXES])
+                for upload in uploads or []:
+                    # Unchanged uploads are recognized by their hash and not embedded again
+                    progress = st.empty()
+                    try:
+                        index.index_text(UPLOAD_PREFIX + upload.name, upload.getvalue().decode("utf-8", errors="replace"),
+                                         on_progress=lambda done, total: progress.progress(
+                                             done / total, text=f"Indexing {upload.name}: {done}/{total} chunks"))
+                    except Exception as e:
+                        st.error(f"Could not index {upload.name}: {str(e)}")
+                    progress.empty()
+                index_stats = index.stats()
+                st.markdown(f"**Indexed:** {index_stats['documents']} documents, {index_stats['chunks']} chunks")
+                ingest = index_stats["last_ingest"]
+                if ingest and ingest["chunks_per_sec"]:
+                    st.markdown(f"**Last ingest:** {ingest['chunks']} chunks in {ingest['seconds']:.1f} s "
+                                f"({ingest['chunks_per_sec']:.1f} chunks/s, {ingest['retries']} retries)")
+                if RAG_FOLDER:
+                    st.markdown(f"**Watching:** `{RAG_FOLDER}`")
+                if index_stats["last_sync_error"]:
+                    st.error(f"Folder sync failed: {index_stats['last_sync_error']}")
+
+        st.subheader("Model Information")
+        try:
+            with section("model info"):
+                model_info = get_model_catalog().show(st.session_state.model_name)
+            st.markdown(f"**Model:** {st.session_state.model_name}")
+            st.markdown(f"**Modified At:** {model_info.get('modified_at', 'N/A')}")
+
+            details = model_info.get('details', {})
+            if details:
+                st.markdown(f"**Format:** {details.get('format', 'N/A')}")
+                st.markdown(f"**Family:** {details.get('family', 'N/A')}")
+                parameters = details.get('parameter_size') or model_info.get('parameters') or 'N/A'
+                st.markdown(f"**Parameters:** {parameters}")
+                quantization = details.get('quantization_level') or 'Not quantized'
+                st.markdown(f"**Quantization:** {quantization}")
+            else:
+                st.warning("No detailed information available for this model.")
+        except Exception as e:
+            st.warning(f"⚠️ Could not retrieve model info. Error: {str(e)}")
+
+        with section("debug panel"), st.expander("Debug Information"):
+            catalog = get_model_catalog()
+            catalog_stats = catalog.stats()
+            st.markdown(f"**Model catalog cache:** {catalog_stats['hits']} hits / {catalog_stats['misses']} misses "
+                        f"({catalog_stats['refreshes']} fetches)")
+            st.markdown(f"**Model info cache:** {catalog_stats['show_hits']} hits / {catalog_stats['show_misses']} misses")
+            if catalog_stats["last_error"]:
+                st.error(f"Last background refresh failed: {catalog_stats['last_error']}")
+            for label, client in (("Ollama pool", get_ollama_client()), ("Ollama stream pool", get_async_client())):
+                pool = client.metrics.stats()
+                st.markdown(f"**{label}:** {pool['in_use']} in use / {pool['idle']} idle of "
+                            f"{pool['max_connections']} connections ({pool['requests']} requests)")
+            queue_stats = get_request_scheduler().stats()
+            wait = "N/A"
+            if queue_stats["wait_avg"] is not None:
+                wait = f"{queue_stats['wait_avg'] * 1000:.0f} ms avg / {queue_stats['wait_p95'] * 1000:.0f} ms p95"
+            st.markdown(f"**Request queue:** {queue_stats['active']} generating / {queue_stats['queued']} waiting "
+                        f"(max {queue_stats['num_parallel']} per model), wait {wait}, "
+                        f"{queue_stats['rejected']} rejected")
+            response_cache = get_response_cache()
+            if response_cache is not None:
+                cache_stats = response_cache.stats()
+                hit_rate = f"{cache_stats['hit_rate']:.0%}" if cache_stats["hit_rate"] is not None else "N/A"
+                st.markdown(f"**Response cache:** {cache_stats['hits']} hits ({cache_stats['disk_hits']} from disk) / "
+                            f"{cache_stats['misses']} misses, hit rate {hit_rate}, "
+                            f"{cache_stats['memory_entries']} replies in memory")
+            semantic_cache = get_semantic_cache()
+            if semantic_cache is not None:
+                semantic_stats = semantic_cache.stats()
+                hit_rate = f"{semantic_stats['hit_rate']:.0%}" if semantic_stats["hit_rate"] is not None else "N/A"
+                embed_ms = f"{semantic_stats['embed_ms_avg']:.0f} ms" if semantic_stats["embed_ms_avg"] is not None else "N/A"
+                st.markdown(f"**Semantic cache:** {semantic_stats['hits']} hits / {semantic_stats['misses']} misses, "
+                            f"hit rate {hit_rate}, {semantic_stats['entries']} entries, "
+                            f"threshold {semantic_stats['threshold']:.2f}, embedding {embed_ms}")
+            cassette = get_cassette()
+            if cassette is not None:
+                cassette_stats = cassette.stats()
+                mode = f"replaying at {REPLAY_SPEED:g}x" if CASSETTE_MODE == "replay" else "recording"
+                st.markdown(f"**Cassette ({mode}):** {cassette_stats['tracks']} tracks, "
+                            f"{cassette_stats['recorded']} recorded / {cassette_stats['replayed']} replayed "
+                            f"({cassette_stats['misses']} without an exact match)")
+            store_stats = get_conversation_store().stats()
+            st.markdown(f"**History pages cache:** {store_stats['page_hits']} hits / "
+                        f"{store_stats['page_misses']} misses ({store_stats['cached_pages']} pages)")
+            memory = st.session_state.memory
+            st.markdown(f"**Context:** ~{memory.prompt_tokens} / {memory.num_ctx} tokens, "
+                        f"{memory.window_messages} recent messages, {memory.summarized} summarized")
+            try:
+                st.markdown("**Available Models:**")
+                for name in catalog.names():
+                    st.markdown(f"- {name}")
+            except Exception as e:
+                st.error(f"Error listing models: {str(e)}")
+            st.markdown(f"**Ollama path:** {shutil.which('ollama') or 'not found'}")
+            if get_metrics_server() is not None:
+                st.markdown(f"**Metrics:** http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+            if st.button("🔄 Refresh model list"):
+                catalog.invalidate()
+                st.rerun()
+
+        if profiling_enabled():
+            with st.expander("⏱️ Rerun profile"):
+                render_profile()
+
+
+# === Function: Aggregated rerun timings from the profiler ===
+def render_profile():
+    profiler = get_profiler()
+    if profiler.capture_error:
+        st.warning(f"⚠️ {profiler.capture_error}; reruns are timed without it.")
+    stats = profiler.stats()
+    rerun = stats["rerun"]
+    if rerun is None:
+        st.markdown("No reruns profiled yet.")
+        return
+    st.markdown(f"**Reruns:** {stats['reruns']} from {stats['sessions']} sessions, "
+                f"{rerun['p50_ms']:.0f} ms p50 / {rerun['p95_ms']:.0f} ms p95 / {rerun['max_ms']:.0f} ms max")
+    sections = sorted(stats["sections"].items(), key=lambda item: item[1]["share"], reverse=True)
+    st.dataframe([{"section": name, "runs": summary["count"], "p50 ms": round(summary["p50_ms"], 1),
+                   "p95 ms": round(summary["p95_ms"], 1), "share": f"{summary['share']:.0%}"}
+                  for name, summary in sections], hide_index=True)
+    if stats["calls"]:
+        st.markdown("**Ollama calls during reruns:**")
+        st.dataframe([{"endpoint": endpoint, "calls": summary["count"], "p50 ms": round(summary["p50_ms"], 1),
+                       "p95 ms": round(summary["p95_ms"], 1)} for endpoint, summary in stats["calls"].items()],
+                     hide_index=True)
+    st.download_button("⬇️ Download profile (JSON)", json.dumps(stats, indent=2), file_name="rerun_profile.json",
+                       mime="application/json")
+    for entry in stats["slowest"]:
+        breakdown = ", ".join(f"{name} {ms:.0f} ms" for name, ms in entry["sections"].items())
+        st.markdown(f"**Slow rerun, {entry['ms']:.0f} ms:** {breakdown}")
+        if entry["profile"]:
+            st.code(entry["profile"], language=None)
+
+
+# === Function: Load a stored conversation (or start an empty one) into the session ===
+def load_conversation(profile, conversation_id=None):
+    store = get_conversation_store()
+    st.session_state.memory = ConversationMemory(profile.system_prompt)
+    st.session_state.history_limit = HISTORY_WINDOW
+    if conversation_id and store.exists(conversation_id):
+        st.session_state.conversation_id = conversation_id
+        st.session_state.messages = store.page(conversation_id)
+        summary, summarized = store.load_summary(conversation_id)
+        st.session_state.memory.restore(
+            summary, summarized, st.session_state.messages,
+            lambda before, limit: store.page(conversation_id, before=before, limit=limit),
+        )
+    else:
+        st.session_state.conversation_id = None
+        st.session_state.messages = []
+
+
+def run_app(profile):
+    """Render the whole chat app for one model profile."""
+    st.set_page_config(page_title=profile.page_title, page_icon=profile.icon, layout="wide")
+
+    get_metrics_server()
+    if "session_id" not in st.session_state:
+        # Identifies this browser session to the request scheduler and the profiler
+        st.session_state.session_id = uuid.uuid4().hex
+    # ?profile=1 keeps profiling on for the rest of the session, even once the URL changes
+    if st.query_params.get(PROFILE_QUERY_PARAM) == "1":
+        st.session_state.profiling = True
+    if profiling_enabled():
+        with get_profiler().rerun(st.session_state.session_id):
+            render_app(profile)
+    else:
+        render_app(profile)
+
+
+def render_app(profile):
+    st.title(f"{profile.icon} {profile.page_title}")
+    st.markdown(f"Chat with the {profile.name} model running locally on Ollama")
+
+    # Session state init
+    if "model_name" not in st.session_state:
+        st.session_state.model_name = profile.default_model
+    if "conversation_id" not in st.session_state:
+        with section("load conversation"):
+            load_conversation(profile, st.query_params.get("c"))
+
+    with section("history"):
+        render_history()
+
+    if prompt := st.chat_input("Ask something..."):
+        with section("prompt"):
+            handle_prompt(profile, prompt)
+
+    with section("sidebar"):
+        render_sidebar(profile)
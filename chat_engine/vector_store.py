@@ -0,0 +1,243 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+# Storage type for embeddings: float32, float16 (half the memory) or int8 (a quarter, per-vector scale)
+VECTOR_DTYPE = os.getenv("CHAT_VECTOR_DTYPE", "float32")
+DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+# Rows scored per matrix product, so float16/int8 blocks are widened to float32 a piece at a time
+BLOCK_ROWS = 4096
+# Id written over deleted rows
+DELETED = -1
+
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class VectorStore:
+    """Append-only embedding matrix with an int64 id per row, searched by cosine similarity.
+
+    With a `path` the rows live in flat files in that directory and are read
+    through `np.memmap`, so opening a large store costs nothing up front and
+    appending writes only the new rows. Without a path everything stays in
+    memory. Vectors are normalized on the way in; `int8` storage keeps one
+    float32 scale per row. Deleting overwrites a row's id in place, and the
+    files are compacted once deleted rows outnumber live ones.
+    """
+
+    def __init__(self, path=None, dtype=VECTOR_DTYPE):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unsupported vector dtype {dtype!r}; use one of {', '.join(DTYPES)}")
+        self.path = path
+        self.dtype = dtype
+        self.dim = None
+        self._count = 0
+        self._deleted = 0
+        self._lock = threading.Lock()
+        self._vectors = None
+        self._ids = None
+        self._scales = None
+        self._mapped = -1
+        if path:
+            os.makedirs(path, exist_ok=True)
+            meta = self._read_meta()
+            if meta:
+                # Existing rows keep the type they were written with
+                self.dtype = meta["dtype"]
+                self.dim = meta["dim"]
+                self._count = meta["count"]
+                self._deleted = meta["deleted"]
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _read_meta(self):
+        try:
+            with open(self._file("meta.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_meta(self):
+        meta = {"dtype": self.dtype, "dim": self.dim, "count": self._count, "deleted": self._deleted}
+        temp = self._file("meta.json.tmp")
+        with open(temp, "w") as f:
+            json.dump(meta, f)
+        # The row count only moves once the rows themselves are on disk
+        os.replace(temp, self._file("meta.json"))
+
+    def __len__(self):
+        return self._count - self._deleted
+
+    def _encode(self, vectors):
+        vectors = normalize(vectors)
+        if self.dtype == "int8":
+            peak = np.abs(vectors).max(axis=1)
+            scales = np.where(peak == 0, 1, peak) / 127
+            return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+        return vectors.astype(DTYPES[self.dtype]), None
+
+    def append(self, ids, vectors):
+        """Add rows; `ids` are caller-chosen non-negative integers."""
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(ids):
+            return
+        data, scales = self._encode(vectors)
+        with self._lock:
+            if self.dim is None:
+                self.dim = data.shape[1]
+            elif data.shape[1] != self.dim:
+                raise ValueError(f"Expected {self.dim}-dimensional vectors, got {data.shape[1]}")
+            if self.path:
+                self._append_files(ids, data, scales)
+            else:
+                self._append_memory(ids, data, scales)
+            self._count += len(ids)
+            if self.path:
+                self._write_meta()
+
+    def _append_files(self, ids, data, scales):
+        # Truncate anything past the committed count (left by a crash mid-append) before writing
+        for name, rows, width in (("vectors.bin", data, data.itemsize * self.dim), ("ids.bin", ids, 8),
+                                  ("scales.bin", scales, 4)):
+            if rows is None:
+                continue
+            with open(self._file(name), "ab") as f:
+                f.truncate(self._count * width)
+                f.write(np.ascontiguousarray(rows).tobytes())
+
+    def _append_memory(self, ids, data, scales):
+        needed = self._count + len(ids)
+        if self._vectors is None or needed > len(self._vectors):
+            capacity = max(needed, 2 * (0 if self._vectors is None else len(self._vectors)), 64)
+            self._vectors = self._grow(self._vectors, (capacity, self.dim), data.dtype)
+            self._ids = self._grow(self._ids, (capacity,), np.int64)
+            if scales is not None:
+                self._scales = self._grow(self._scales, (capacity,), np.float32)
+        self._vectors[self._count:needed] = data
+        self._ids[self._count:needed] = ids
+        if scales is not None:
+            self._scales[self._count:needed] = scales
+
+    def _grow(self, array, shape, dtype):
+        grown = np.zeros(shape, dtype=dtype)
+        if array is not None:
+            grown[:self._count] = array[:self._count]
+        return grown
+
+    def _views(self):
+        """The (vectors, ids, scales) arrays for the committed rows."""
+        if not self.path:
+            scales = None if self._scales is None else self._scales[:self._count]
+            return self._vectors[:self._count], self._ids[:self._count], scales
+        if self._mapped != self._count:
+            dtype = DTYPES[self.dtype]
+            self._vectors = np.memmap(self._file("vectors.bin"), dtype=dtype, mode="r", shape=(self._count, self.dim))
+            self._ids = np.memmap(self._file("ids.bin"), dtype=np.int64, mode="r+", shape=(self._count,))
+            self._scales = None
+            if self.dtype == "int8":
+                self._scales = np.memmap(self._file("scales.bin"), dtype=np.float32, mode="r", shape=(self._count,))
+            self._mapped = self._count
+        return self._vectors, self._ids, self._scales
+
+    def ids(self):
+        """Ids of the live rows, in storage order."""
+        with self._lock:
+            if not self._count:
+                return np.empty(0, dtype=np.int64)
+            _, row_ids, _ = self._views()
+            return np.array(row_ids[row_ids != DELETED])
+
+    def delete(self, ids):
+        """Remove rows by id (their slots are reclaimed at the next compaction)."""
+        with self._lock:
+            if not self._count:
+                return
+            _, row_ids, _ = self._views()
+            hits = np.isin(row_ids, np.asarray(list(ids), dtype=np.int64)) & (row_ids != DELETED)
+            removed = int(hits.sum())
+            if not removed:
+                return
+            row_ids[hits] = DELETED
+            self._deleted += removed
+            if self.path:
+                row_ids.flush()
+            if self._deleted * 2 > self._count:
+                self._compact()
+            elif self.path:
+                self._write_meta()
+
+    def _compact(self):
+        vectors, row_ids, scales = self._views()
+        keep = row_ids != DELETED
+        vectors, row_ids = np.array(vectors[keep]), np.array(row_ids[keep])
+        scales = None if scales is None else np.array(scales[keep])
+        self._count = self._deleted = 0
+        self._vectors = self._ids = self._scales = None
+        self._mapped = -1
+        if self.path:
+            for name in ("vectors.bin", "ids.bin", "scales.bin"):
+                if os.path.exists(self._file(name)):
+                    os.remove(self._file(name))
+            self._append_files(row_ids, vectors, scales)
+        elif len(row_ids):
+            self._append_memory(row_ids, vectors, scales)
+        self._count = len(row_ids)
+        if self.path:
+            self._write_meta()
+
+    def clear(self):
+        with self._lock:
+            self._count = self._deleted = 0
+            self._vectors = self._ids = self._scales = None
+            self._mapped = -1
+            self.dim = None
+            if self.path:
+                for name in ("vectors.bin", "ids.bin", "scales.bin"):
+                    if os.path.exists(self._file(name)):
+                        os.remove(self._file(name))
+                self._write_meta()
+
+    def search(self, query, k=10, candidates=None):
+        """The `k` best `(id, cosine similarity)` pairs, best first.
+
+        `candidates`, if given, restricts the search to those ids.
+        """
+        query = normalize(query)
+        with self._lock:
+            if not self._count or query.shape[-1] != self.dim:
+                return []
+            vectors, row_ids, scales = self._views()
+            scores = np.empty(self._count, dtype=np.float32)
+            for start in range(0, self._count, BLOCK_ROWS):
+                end = min(start + BLOCK_ROWS, self._count)
+                scores[start:end] = vectors[start:end].astype(np.float32, copy=False) @ query
+            if scales is not None:
+                scores *= scales
+            valid = row_ids != DELETED
+            if candidates is not None:
+                valid &= np.isin(row_ids, np.asarray(list(candidates), dtype=np.int64))
+            row_ids = np.array(row_ids)
+        scores[~valid] = -np.inf
+        k = min(k, int(valid.sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(row_ids[i]), float(scores[i])) for i in top]
+
+    def stats(self):
+        with self._lock:
+            width = (self.dim or 0) * np.dtype(DTYPES[self.dtype]).itemsize + 8 + (4 if self.dtype == "int8" else 0)
+            return {
+                "vectors": self._count - self._deleted,
+                "deleted": self._deleted,
+                "dim": self.dim,
+                "dtype": self.dtype,
+                "bytes": self._count * width,
+            }
@@ -13,7 +13,8 @@ def check_ollama_installation():
         # Check if DeepSeek-R1 is in the list
         deepseek_available = False
         for model in models.get('models', []):
-            model_name = model.get('name', '')
+            # Newer ollama clients call the field 'model', older ones 'name'
+            model_name = model.get('model') or model.get('name', '')
             print(f"- {model_name}")
             if 'deepseek-r1' in model_name:
                 deepseek_available = True
@@ -0,0 +1,59 @@
+from chat_engine.history import ConversationMemory, assistant_message, user_message
+from chat_engine.store import PAGE_SIZE, ConversationStore
+
+
+def fill(store, conversation_id, turns):
+    for i in range(turns):
+        store.append(conversation_id, user_message(f"question {i}"))
+        store.append(conversation_id, assistant_message(f"answer {i}"))
+
+
+def restore(store, conversation_id):
+    memory = ConversationMemory("system")
+    memory.restore(*store.load_summary(conversation_id), store.page(conversation_id),
+                   lambda before, limit: store.page(conversation_id, before=before, limit=limit))
+    return memory
+
+
+def test_restore_keeps_messages_before_the_page_that_were_never_summarized(tmp_path):
+    store = ConversationStore(str(tmp_path / "chat.db"))
+    conversation_id = store.create("llama3")
+    fill(store, conversation_id, PAGE_SIZE)
+
+    memory = restore(store, conversation_id)
+    context = memory.build("next question", num_ctx=100_000)
+
+    assert memory.summarized == 0
+    assert memory.window_messages == 2 * PAGE_SIZE
+    assert context[1] == {"role": "user", "content": "question 0"}
+
+
+def test_restore_starts_after_the_summary(tmp_path):
+    store = ConversationStore(str(tmp_path / "chat.db"))
+    conversation_id = store.create("llama3")
+    fill(store, conversation_id, PAGE_SIZE)
+    store.save_summary(conversation_id, "earlier turns", 2 * PAGE_SIZE - 10)
+
+    memory = restore(store, conversation_id)
+    context = memory.build("next question", num_ctx=100_000)
+
+    assert memory.summarized == 2 * PAGE_SIZE - 10
+    assert memory.window_messages == 10
+    assert context[2] == {"role": "user", "content": f"question {PAGE_SIZE - 5}"}
+
+
+def test_evicted_gap_is_summarized(tmp_path):
+    store = ConversationStore(str(tmp_path / "chat.db"))
+    conversation_id = store.create("llama3")
+    fill(store, conversation_id, PAGE_SIZE)
+    evicted = []
+
+    def summarize(previous, messages, max_tokens):
+        evicted.extend(messages)
+        return "summary"
+
+    memory = restore(store, conversation_id)
+    memory.build("next question", num_ctx=512, summarize=summarize)
+
+    assert evicted[0] == {"role": "user", "content": "question 0"}
+    assert memory.summarized == len(evicted)
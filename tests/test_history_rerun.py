@@ -0,0 +1,77 @@
+import sys
+from pathlib import Path
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import chat_engine.ui
+from chat_engine.history import ConversationMemory, assistant_message, user_message
+from chat_engine.store import ConversationStore
+from chat_engine.think import ThinkStreamParser
+
+APP = Path(__file__).resolve().parent.parent / "chatapp.py"
+
+
+@pytest.fixture
+def think_calls(monkeypatch):
+    """Count every call that would parse <think> tags."""
+    calls = []
+
+    def feed(self, chunk):
+        calls.append(("feed", chunk))
+        return []
+
+    def split_think(text):
+        calls.append(("split_think", text))
+        return text, ""
+
+    monkeypatch.setattr(ThinkStreamParser, "feed", feed)
+    # Wherever it was imported by name
+    for name, module in list(sys.modules.items()):
+        if name.startswith("chat_engine") and hasattr(module, "split_think"):
+            monkeypatch.setattr(module, "split_think", split_think)
+    return calls
+
+
+@pytest.fixture
+def conversation(tmp_path):
+    store = ConversationStore(str(tmp_path / "chat.db"))
+    conversation_id = store.create("deepseek")
+    for i in range(3):
+        store.append(conversation_id, user_message(f"question {i}"))
+        store.append(conversation_id, assistant_message(f"answer {i}", f"reasoning {i}"))
+    return store, conversation_id
+
+
+def test_restoring_a_conversation_parses_nothing(conversation, think_calls):
+    store, conversation_id = conversation
+    messages = store.page(conversation_id)
+    memory = ConversationMemory("system")
+    memory.restore(*store.load_summary(conversation_id), messages)
+    context = memory.build("next question")
+
+    assert think_calls == []
+    assert [m.think for m in messages if m.role == "assistant"] == ["reasoning 0", "reasoning 1", "reasoning 2"]
+    # Reasoning is never sent back to the model
+    assert not any("reasoning" in m["content"] for m in context)
+
+
+def test_reruns_render_history_without_parsing(conversation, think_calls, monkeypatch):
+    store, conversation_id = conversation
+    monkeypatch.setattr(chat_engine.ui, "ConversationStore", lambda: store)
+    st.cache_resource.clear()
+    try:
+        app = AppTest.from_file(str(APP), default_timeout=30)
+        app.query_params["c"] = conversation_id
+        app.run()
+        app.run()
+    finally:
+        st.cache_resource.clear()
+
+    assert not app.exception
+    assert think_calls == []
+    rendered = [element.value for element in app.markdown]
+    for i in range(3):
+        assert f"answer {i}" in rendered
+        assert f"reasoning {i}" in rendered